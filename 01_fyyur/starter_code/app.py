@@ -2,47 +2,130 @@
 # Imports
 #----------------------------------------------------------------------------#
 
+import hashlib
 import json
-from datetime import datetime
+import os
+from datetime import datetime, timedelta
+from itertools import groupby, islice
+from functools import lru_cache
 import dateutil.parser
 import babel
+import babel.dates
 from flask import (
     render_template,
     request,
     Response,
     flash,
     redirect,
-    url_for
+    url_for,
+    stream_with_context,
+    abort
 )
 import logging
 from logging import Formatter, FileHandler
 from flask_wtf import Form
+from sqlalchemy.exc import IntegrityError
 from forms import *
 from models import *
+from cache import cache
+from autocomplete import autocomplete, INDEXED_MODELS
+from bookings import EXCLUSION_VIOLATION, booked_between, find_booking_conflict, booking_conflict_message
+from monitoring import pool_status
+from replicas import replica_router
+import commands
+import counters
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+@lru_cache(maxsize=None)
+def compile_datetime_format(format, locale='en'):
+    '''
+    Compiles a date format once per (format, locale).
+
+    Parameters:
+        format (str): 'full', 'medium' or a Babel pattern.
+        locale (str): The locale to format in.
+    Returns:
+        pattern (obj): The parsed Babel pattern.
+        locale (obj): The parsed Babel locale.
+    '''
+
+    pattern = babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+    return pattern, babel.Locale.parse(locale)
+
+def format_datetime(value, format='medium', locale='en'):
     '''
     Transforms the date to the desired format.
 
     Parameters:
-        value (obj): Date object.
+        value (obj): Date object, or a date string.
+        format (str): The format to transform to.
+        locale (str): The locale to format in.
+    Returns:
+        The date in the desired format.
+    '''
+
+    if not isinstance(value, datetime):
+        value = dateutil.parser.parse(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=babel.dates.UTC)
+
+    pattern, locale = compile_datetime_format(format, locale)
+
+    return pattern.apply(value, locale)
+
+def format_datetimes(values, format='medium', locale='en'):
+    '''
+    Transforms a whole column of dates to the desired format.
+
+    Parameters:
+        values (list): Date objects.
         format (str): The format to transform to.
+        locale (str): The locale to format in.
     Returns:
-        The date inn the desired format.
+        dates (list): The dates in the desired format.
+    '''
+
+    pattern, locale = compile_datetime_format(format, locale)
+
+    return [
+        pattern.apply(value if value.tzinfo else value.replace(tzinfo=babel.dates.UTC), locale)
+        for value in values
+    ]
+
+def format_start_times(shows, format='full'):
     '''
+    Formats the start times of show details in place, in one call of
+    format_datetimes.
 
-    date = dateutil.parser.parse(value)
+    Parameters:
+        shows (list): Show detail dicts.
+        format (str): The format to transform to.
+    Returns:
+        shows (list): The same dicts, start_time formatted.
+    '''
 
-    if format == 'full':
-        format="EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format="EE MM, dd, y h:mma"
+    for show, start_time in zip(shows, format_datetimes([show["start_time"] for show in shows], format)):
+        show["start_time"] = start_time
 
-    return babel.dates.format_datetime(date, format, locale='en')
+    return shows
+
+def format_start_times_in_batches(shows, format='full'):
+    '''
+    Formats the start times of show details read as they come, one batch
+    of STREAM_BATCH_SIZE shows at a time.
+    '''
+
+    shows = iter(shows)
+    for batch in iter(lambda: list(islice(shows, app.config['STREAM_BATCH_SIZE'])), []):
+        yield from format_start_times(batch, format)
 
 app.jinja_env.filters['datetime'] = format_datetime
 
@@ -63,100 +146,567 @@ def create_boolean_value(answer):
     bool_value = True if answer == 'y' else False
     return bool_value
 
-def create_genre_list(genres_str):
+def get_date_arg(name, end=False):
+    '''
+    Reads a date or datetime query string argument.
+
+    Parameters:
+        name (str): The argument name.
+        end (bool): Whether it ends an excluded range bound, so that a date
+            alone, e.g. ?to=2021-06-30, includes that whole day.
+    Returns:
+        date (obj): The datetime, None if the argument is missing. Aborts
+            with 400 if it is not an ISO 8601 date, e.g. 2021-06-01 or
+            2021-06-01T20:00.
+    '''
+
+    value = request.args.get(name)
+    if not value:
+        return None
+
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, description='{} must be an ISO 8601 date'.format(name))
+
+    if end and len(value) == len('2021-06-30'):
+        date += timedelta(days=1)
+
+    return date
+
+def get_int_arg(name, default=None):
+    '''
+    Reads an integer query string argument.
+
+    Parameters:
+        name (str): The argument name.
+        default (int): The value of a missing argument.
+    Returns:
+        value (int): The integer. Aborts with 400 if it is not one.
+    '''
+
+    value = request.args.get(name)
+    if not value:
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        abort(400, description='{} must be an integer'.format(name))
+
+def filter_by_genres(query, column):
+    '''
+    Filters a query on the genres in the query string.
+
+    ?genre=Jazz&genre=Blues keeps the rows having any of the genres, adding
+    &match=all keeps the rows having all of them. Both operators (&& and
+    @>) are served by the GIN index on the genres column.
+
+    Parameters:
+        query (obj): The query to filter.
+        column (obj): Venue.genres or Artist.genres.
+    Returns:
+        query (obj): The filtered query, unchanged without ?genre.
+    '''
+
+    genres = [genre for genre in request.args.getlist('genre') if genre]
+    match = request.args.get('match', 'any')
+
+    if match not in ('any', 'all'):
+        abort(400, description='match must be any or all')
+    if not genres:
+        return query
+
+    return query.filter(column.contains(genres) if match == 'all' else column.overlap(genres))
+
+def escape_like(term):
+    '''
+    Escapes the LIKE wildcards in a search term.
+
+    Parameters:
+        term (str): The raw search term.
+    Returns:
+        term (str): The term with %, _ and \\ escaped.
+    '''
+
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def search_by_name(model, search_term):
+    '''
+    Searches venues or artists by name using the trigram indexed ILIKE.
+
+    Exact matches are ranked first, then names starting with the term,
+    then shorter names. At most SEARCH_RESULTS_LIMIT rows are returned.
+
+    Parameters:
+        model (obj): Venue or Artist.
+        search_term (str): The term to look for.
+    Returns:
+        results (list): (id, name, upcoming show count) tuples of the best
+            matches.
+    '''
+
+    term = escape_like(search_term)
+    name = db.func.lower(model.name)
+
+    return db.session.query(model.id, model.name, model.upcoming_shows_count) \
+        .filter(model.name.ilike('%' + term + '%')) \
+        .order_by(
+            db.desc(name == search_term),
+            db.desc(name.like(term + '%')),
+            db.func.length(model.name),
+            model.name
+        ).limit(app.config['SEARCH_RESULTS_LIMIT']).all()
+
+def autocomplete_from_database(model, prefix):
     '''
-    Creates a list of genres.
+    Finds the venues or artists with a word of their name starting with a
+    prefix, when the autocomplete index is not available.
+
     Parameters:
-        genres_str (str): string of genres, braces and commas.
+        model (obj): Venue or Artist.
+        prefix (str): The typed prefix.
     Returns:
-        genres (list): list of genres.
+        matches (list): (id, name) tuples.
     '''
 
-    genres = ''.join(genres_str)
-    genres = genres.strip('{}')
-    genres = genres.split(',')
+    term = escape_like(' '.join(prefix.split()))
+
+    return db.session.query(model.id, model.name) \
+        .filter(db.or_(model.name.ilike(term + '%'), model.name.ilike('% ' + term + '%'))) \
+        .order_by(model.name).limit(app.config['AUTOCOMPLETE_LIMIT']).all()
+
+def split_schedule(schedule, now, past_limit=None):
+    '''
+    Splits an ordered schedule into past and upcoming shows in one pass.
 
-    return genres
+    Parameters:
+        schedule (list): Show rows ordered by start time.
+        now (obj): The datetime separating past from upcoming shows.
+        past_limit (int): Keep only the most recent past shows.
+    Returns:
+        past_shows (list): Past shows, most recent first.
+        upcoming_shows (list): Upcoming shows, soonest first.
+    '''
+
+    past_shows = []
+    upcoming_shows = []
+
+    for show in schedule:
+        details = show._asdict()
+        if show.start_time < now:
+            past_shows.append(details)
+        else:
+            upcoming_shows.append(details)
+
+    past_shows.reverse()
+
+    return past_shows[:past_limit], upcoming_shows
+
+def page_url(**cursor):
+    '''
+    Builds the url of a neighbouring page of the current listing.
+
+    Parameters:
+        cursor (dict): after=<id> or before=<id>.
+    Returns:
+        url (str): The current url with the cursor replaced.
+    '''
+
+    args = request.args.to_dict(flat=False)
+    args.pop('after', None)
+    args.pop('before', None)
+    args.update(cursor)
+
+    return url_for(request.endpoint, **args)
+
+def keyset_arguments():
+    '''
+    Reads the page size and cursor of a listing from the query string,
+    aborting with 400 if one of them is not an integer.
+
+    Returns:
+        limit (int): The page size, bounded by MAX_PAGE_SIZE.
+        after (int): The id after which the page starts, or None.
+        before (int): The id before which the page ends, or None.
+    '''
+
+    limit = get_int_arg('limit', app.config['PAGE_SIZE'])
+    limit = max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+    return limit, get_int_arg('after'), get_int_arg('before')
+
+def keyset_query(query, key_columns, cursor, backwards, limit):
+    '''
+    Restricts a query to the page following or preceding a cursor.
+
+    Parameters:
+        query (obj): The query to paginate.
+        key_columns (list): The ordering columns, ending with the id.
+        cursor (tuple): The key of the cursor row, or None for the first
+            page.
+        backwards (bool): Fetch the page before the cursor, in reverse.
+        limit (int): The page size, one more row is fetched to tell
+            whether there is another page.
+    Returns:
+        query (obj): The page query.
+    '''
+
+    key = db.tuple_(*key_columns)
+
+    if backwards:
+        query = query.filter(key < db.tuple_(*cursor)) \
+            .order_by(*[column.desc() for column in key_columns])
+    else:
+        if cursor is not None:
+            query = query.filter(key > db.tuple_(*cursor))
+        query = query.order_by(*key_columns)
+
+    return query.limit(limit + 1)
+
+def keyset_rows(page, fetched, limit, has_cursor, backwards):
+    '''
+    Yields the rows of a page and sets its previous/next page urls once
+    they have all been read.
+
+    Parameters:
+        page (dict): The page to set the urls of.
+        fetched (iter): The rows of the page query.
+        limit (int): The page size.
+        has_cursor (bool): Whether the page has a cursor.
+        backwards (bool): Whether the rows were fetched in reverse.
+    '''
+
+    if backwards:
+        # Fetched in reverse, at most one page and one extra row.
+        fetched = list(fetched)
+        has_more = len(fetched) > limit
+        fetched = fetched[:limit][::-1]
+    else:
+        has_more = False
+
+    first_id = last_id = None
+
+    for index, row in enumerate(fetched):
+        if index == limit:
+            has_more = True
+            break
+        if first_id is None:
+            first_id = row.id
+        last_id = row.id
+        yield row
+
+    has_prev, has_next = (has_more, True) if backwards else (has_cursor, has_more)
+
+    if first_id is not None:
+        if has_prev:
+            page["prev_url"] = page_url(before=first_id)
+        if has_next:
+            page["next_url"] = page_url(after=last_id)
+
+def keyset_paginate(query, model, key_columns, stream=False):
+    '''
+    Paginates a query by keyset on indexed columns.
+
+    The page cursor is the id of the last (?after=<id>) or first
+    (?before=<id>) row of the neighbouring page and is resolved to that
+    row's key so no OFFSET is ever needed.
+
+    Parameters:
+        query (obj): The query to paginate, its rows must have an id.
+        model (obj): The model the cursor id belongs to.
+        key_columns (list): The ordering columns, ending with model.id.
+        stream (bool): Yield the rows from a server-side cursor instead of
+            loading them into a list. The page urls are only set once the
+            rows have been consumed.
+    Returns:
+        page (dict): The rows and the previous/next page urls.
+    '''
+
+    limit, after, before = keyset_arguments()
+    cursor_id = before if before is not None else after
+    cursor = None
+
+    if cursor_id is not None:
+        cursor = db.session.query(*key_columns).filter(model.id == cursor_id).first()
+
+    backwards = cursor is not None and before is not None
+    query = keyset_query(query, key_columns, cursor, backwards, limit)
+    page = {"items": [], "prev_url": None, "next_url": None}
+
+    if stream and not backwards:
+        fetched = query.yield_per(app.config['STREAM_BATCH_SIZE'])
+    else:
+        fetched = query.all()
+
+    rows = keyset_rows(page, fetched, limit, cursor is not None, backwards)
+    page["items"] = rows if stream else list(rows)
+
+    return page
+
+def stream_template(template_name, **context):
+    '''
+    Renders a template as a streamed response.
+
+    The first chunks are sent while generators in the context are still
+    being consumed, so big pages start arriving before they are complete.
+
+    Parameters:
+        template_name (str): The template to render.
+        context (dict): The template variables.
+    Returns:
+        response (obj): The streamed response.
+    '''
+
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    stream = template.stream(context)
+    stream.enable_buffering(app.config['STREAM_BATCH_SIZE'])
+
+    return Response(stream_with_context(stream))
+
+def venue_pages(venue_id):
+    '''
+    Lists the cached pages showing a venue's details.
+
+    Parameters:
+        venue_id (int): The venue id.
+    Returns:
+        pages (list): (endpoint, view_args) pairs.
+    '''
+
+    # Archived shows are on the artist pages too.
+    artist_ids = db.session.execute(db.union(
+        db.select(Show.artist_id).where(Show.venue_id == venue_id),
+        db.select(ShowArchive.artist_id).where(ShowArchive.venue_id == venue_id)
+    )).all()
+
+    return [('venues', {}), ('shows', {}), ('show_venue', {'venue_id': venue_id})] + \
+        [('show_artist', {'artist_id': artist_id}) for artist_id, in artist_ids]
+
+def artist_pages(artist_id):
+    '''
+    Lists the cached pages showing an artist's details.
+
+    Parameters:
+        artist_id (int): The artist id.
+    Returns:
+        pages (list): (endpoint, view_args) pairs.
+    '''
+
+    venue_ids = db.session.execute(db.union(
+        db.select(Show.venue_id).where(Show.artist_id == artist_id),
+        db.select(ShowArchive.venue_id).where(ShowArchive.artist_id == artist_id)
+    )).all()
+
+    return [('artists', {}), ('shows', {}), ('show_artist', {'artist_id': artist_id})] + \
+        [('show_venue', {'venue_id': venue_id}) for venue_id, in venue_ids]
+
+def invalidate_pages(pages):
+    '''
+    Drops cached pages.
+
+    Parameters:
+        pages (list): (endpoint, view_args) pairs.
+    '''
+
+    for endpoint, view_args in pages:
+        cache.invalidate(endpoint, **view_args)
 
 #----------------------------------------------------------------------------#
-# Controllers.
+# Queries.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
-def index():
-  return render_template('pages/home.html')
+# Shared by the HTML views and the JSON API. Each listing and detail page
+# has a function building its queries, without running them, and one
+# formatting their rows, so asgi.py can run the same queries on the async
+# engine.
 
-#  Venues
-#  ----------------------------------------------------------------
+VENUE_AREAS_KEY = [Venue.state, Venue.city, Venue.id]
 
-@app.route('/venues')
-def venues():
-    cities = db.session.query(Venue.city, Venue.state).distinct(Venue.city, Venue.state).all()
+def venue_areas_query():
+    '''
+    Builds the venue listing query, filtered on ?genre.
+
+    Returns:
+        query (obj): The venues ordered so that venues of the same area are
+            adjacent, to paginate on VENUE_AREAS_KEY.
+    '''
+
+    # The upcoming show counts are maintained on the venue rows.
+    venues_query = db.session.query(
+        Venue.state,
+        Venue.city,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count
+    )
 
-    venue_details = []
+    return filter_by_genres(venues_query, Venue.genres)
 
-    for city in cities:
-        venues = Venue.query.filter(Venue.city==city[0] and Venue.state==city[1]).all()
-        upcoming_shows_query = db.session.query(Show).join(Venue).filter(Venue.city==city[0] and Venue.state==city[1]).all()
-        venue_details.append({
-            "city": city[0],
-            "state": city[1],
+def group_venue_areas(rows):
+    '''
+    Groups a page of venue listing rows by area.
+
+    Parameters:
+        rows (list): Rows of venue_areas_query.
+    Returns:
+        areas (list): Areas with their venues and upcoming show counts.
+    '''
+
+    areas = []
+
+    for (state, city), area_venues in groupby(rows, key=lambda row: (row[0], row[1])):
+        areas.append({
+            "city": city,
+            "state": state,
             "venues": [{
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": len(upcoming_shows_query),
-            } for venue in venues]
+                "id": venue_id,
+                "name": name,
+                "num_upcoming_shows": num_upcoming_shows,
+            } for _, _, venue_id, name, num_upcoming_shows in area_venues]
         })
 
-    return render_template('pages/venues.html', areas=venue_details)
+    return areas
 
-@app.route('/venues/search', methods=['POST'])
-def search_venues():
-    search_term = request.form.get('search_term').lower()
-    venues_search = Venue.query.filter(Venue.name.ilike('%' + search_term + '%')).all()
+def get_venue_areas():
+    '''
+    Lists a page of venues grouped by area, filtered on ?genre.
 
-    results = {
-      "count": len(venues_search),
-      "data": [{
-          "id": venue.id,
-          "name": venue.name,
-          "num_upcoming_shows": len(db.session.query(Show).join(Venue). \
-          filter(Venue.id==venue.id).filter(Show.start_time > datetime.now()).all()),
-      } for venue in venues_search]
-    }
+    Returns:
+        areas (list): Areas with their venues and upcoming show counts.
+        page (dict): The previous/next page urls.
+    '''
 
-    return render_template('pages/search_venues.html', results=results, search_term=search_term)
+    page = keyset_paginate(venue_areas_query(), Venue, VENUE_AREAS_KEY)
 
-@app.route('/venues/<int:venue_id>')
-def show_venue(venue_id):
-    venue = Venue.query.filter_by(id=venue_id).first()
+    return group_venue_areas(page["items"]), page
 
-    past_shows_query = db.session.query(Show).join(Venue).filter(Venue.id == venue_id).filter(Show.start_time < datetime.now()).all()
-    upcoming_shows_query = db.session.query(Show).join(Venue).filter(Venue.id == venue_id).filter(Show.start_time > datetime.now()).all()
+def available_venues_query(start_time, end_time):
+    '''
+    Builds the query of the venues seeking talent with no show booked
+    between two datetimes, filtered on ?city, ?state and ?genre.
 
-    past_shows = []
-    upcoming_shows = []
+    The booked venues are removed with an anti-join (NOT EXISTS) looking up
+    each venue's shows in the booking constraint's index, and the venues
+    seeking talent are read from a partial index in listing order.
 
-    for show in past_shows_query:
-        past_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-        })
+    Parameters:
+        start_time (obj): The start of the period.
+        end_time (obj): The end of the period, excluded.
+    Returns:
+        query (obj): The venue listing query, to paginate on
+            VENUE_AREAS_KEY.
+    '''
 
-    for show in upcoming_shows_query:
-        upcoming_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-        })
+    booked = db.session.query(Show.id) \
+        .filter(Show.venue_id == Venue.id, booked_between(start_time, end_time)) \
+        .exists()
+    query = venue_areas_query().filter(Venue.seeking_talent, ~booked)
+
+    for name, column in (('city', Venue.city), ('state', Venue.state)):
+        if request.args.get(name):
+            query = query.filter(column == request.args[name])
+
+    return query
+
+def get_available_venues():
+    '''
+    Lists a page of the venues available between ?from and ?to, grouped by
+    area.
+
+    Returns:
+        areas (list): Areas with their available venues.
+        page (dict): The previous/next page urls.
+    '''
+
+    start_time, end_time = get_date_arg('from'), get_date_arg('to', end=True)
+    if start_time is None or end_time is None or start_time >= end_time:
+        abort(400, description='from and to are required, from before to')
+
+    page = keyset_paginate(available_venues_query(start_time, end_time), Venue, VENUE_AREAS_KEY)
+
+    return group_venue_areas(page["items"]), page
+
+def schedule_shows(column, value):
+    '''
+    Selects the shows of a venue or artist: all of the show table and the
+    PAST_SHOWS_LIMIT most recent of the archive, the only archived ones
+    that can be among the most recent past shows.
+
+    Parameters:
+        column (str): venue_id or artist_id.
+        value (int): The venue or artist id.
+    Returns:
+        shows (obj): A subquery of their start_time, venue_id and artist_id.
+    '''
 
-    venue_details = {
+    columns = ('start_time', 'venue_id', 'artist_id')
+    archive = ShowArchive.__table__.c
+    archived = db.select(*[archive[name] for name in columns]) \
+        .where(archive[column] == value) \
+        .order_by(archive.start_time.desc()) \
+        .limit(app.config['PAST_SHOWS_LIMIT']) \
+        .subquery()
+
+    return db.union_all(
+        db.select(*[Show.__table__.c[name] for name in columns]).where(Show.__table__.c[column] == value),
+        db.select(archived)
+    ).subquery('shows')
+
+def past_shows_count_query(column, value):
+    '''
+    Counts the past shows of a venue or artist, archived ones included,
+    where the schedule only lists the PAST_SHOWS_LIMIT most recent.
+
+    Parameters:
+        column (str): venue_id or artist_id.
+        value (int): The venue or artist id.
+    Returns:
+        count (obj): A select of the count.
+    '''
+
+    now = datetime.now()
+    counts = [
+        db.select(db.func.count()).where(table.c[column] == value, table.c.start_time < now).scalar_subquery()
+        for table in (Show.__table__, ShowArchive.__table__)
+    ]
+
+    return db.select(counts[0] + counts[1])
+
+def venue_schedule_query(venue_id):
+    '''
+    Builds the query of a venue's shows with their artist, by start time.
+    '''
+
+    shows = schedule_shows('venue_id', venue_id)
+
+    return db.session.query(
+        shows.c.start_time,
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Artist, shows.c.artist_id == Artist.id) \
+     .order_by(shows.c.start_time)
+
+def venue_details(venue, schedule, past_shows_count):
+    '''
+    Formats a venue with its past and upcoming shows.
+
+    Parameters:
+        venue (obj): The Venue, or a row of its columns.
+        schedule (list): Rows of venue_schedule_query.
+        past_shows_count (int): The result of past_shows_count_query.
+    Returns:
+        venue (dict): The venue details.
+    '''
+
+    past_shows, upcoming_shows = split_schedule(schedule, datetime.now(), app.config['PAST_SHOWS_LIMIT'])
+
+    return {
       "id": venue.id,
       "name": venue.name,
-      "genres": create_genre_list(venue.genres),
+      "genres": venue.genres or [],
       "address": venue.address,
       "city": venue.city,
       "state": venue.state,
@@ -168,10 +718,253 @@ def show_venue(venue_id):
       "image_link": venue.image_link,
       "past_shows": past_shows,
       "upcoming_shows": upcoming_shows,
-      "past_shows_count": len(past_shows_query),
-      "upcoming_shows_count": len(upcoming_shows_query)
+      "past_shows_count": past_shows_count,
+      "upcoming_shows_count": len(upcoming_shows)
+    }
+
+def get_venue_details(venue_id):
+    '''
+    Gets a venue with its past and upcoming shows.
+
+    Parameters:
+        venue_id (int): The venue id.
+    Returns:
+        venue (dict): The venue details, 404 if there is no such venue.
+    '''
+
+    venue = Venue.query.get_or_404(venue_id)
+
+    past_shows_count = db.session.execute(past_shows_count_query('venue_id', venue_id)).scalar()
+
+    return venue_details(venue, venue_schedule_query(venue_id).all(), past_shows_count)
+
+ARTISTS_KEY = [Artist.id]
+
+def artists_query():
+    '''
+    Builds the artist listing query, filtered on ?genre.
+    '''
+
+    return filter_by_genres(db.session.query(Artist.id, Artist.name), Artist.genres)
+
+def artist_summaries(rows):
+    '''
+    Formats a page of artist listing rows.
+
+    Parameters:
+        rows (list): Rows of artists_query.
+    Returns:
+        artists (list): The artist ids and names.
+    '''
+
+    artists = []
+
+    for artist in rows:
+        artists.append({
+          "id": artist.id,
+          "name": artist.name,
+        })
+
+    return artists
+
+def get_artists():
+    '''
+    Lists a page of artists, filtered on ?genre.
+
+    Returns:
+        artists (list): The artist ids and names.
+        page (dict): The previous/next page urls.
+    '''
+
+    page = keyset_paginate(artists_query(), Artist, ARTISTS_KEY)
+
+    return artist_summaries(page["items"]), page
+
+def artist_schedule_query(artist_id):
+    '''
+    Builds the query of an artist's shows with their venue, by start time.
+    '''
+
+    shows = schedule_shows('artist_id', artist_id)
+
+    return db.session.query(
+        shows.c.start_time,
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link')
+    ).join(Venue, shows.c.venue_id == Venue.id) \
+     .order_by(shows.c.start_time)
+
+def artist_details(artist, schedule, past_shows_count):
+    '''
+    Formats an artist with their past and upcoming shows.
+
+    Parameters:
+        artist (obj): The Artist, or a row of its columns.
+        schedule (list): Rows of artist_schedule_query.
+        past_shows_count (int): The result of past_shows_count_query.
+    Returns:
+        artist (dict): The artist details.
+    '''
+
+    past_shows, upcoming_shows = split_schedule(schedule, datetime.now(), app.config['PAST_SHOWS_LIMIT'])
+
+    return {
+      "id": artist.id,
+      "name": artist.name,
+      "genres": artist.genres or [],
+      "city": artist.city,
+      "state": artist.state,
+      "phone": artist.phone,
+      "website": artist.website_link,
+      "facebook_link": artist.facebook_link,
+      "seeking_venue": artist.seeking_venue,
+      "seeking_description": artist.seeking_description,
+      "image_link": artist.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": upcoming_shows,
+      "past_shows_count": past_shows_count,
+      "upcoming_shows_count": len(upcoming_shows)
+    }
+
+def get_artist_details(artist_id):
+    '''
+    Gets an artist with their past and upcoming shows.
+
+    Parameters:
+        artist_id (int): The artist id.
+    Returns:
+        artist (dict): The artist details, 404 if there is no such artist.
+    '''
+
+    artist = Artist.query.get_or_404(artist_id)
+
+    past_shows_count = db.session.execute(past_shows_count_query('artist_id', artist_id)).scalar()
+
+    return artist_details(artist, artist_schedule_query(artist_id).all(), past_shows_count)
+
+# Chronological, the index on (start_time, id) serves the ?from/?to range
+# and the order.
+SHOWS_KEY = [Show.start_time, Show.id]
+
+def shows_query():
+    '''
+    Builds the show listing query, filtered on ?from and ?to.
+    '''
+
+    # Venue and artist columns come with the show rows in one joined query.
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Venue, Show.venue_id == Venue.id) \
+     .join(Artist, Show.artist_id == Artist.id)
+
+    # Shows starting in [from, to).
+    start_time, end_time = get_date_arg('from'), get_date_arg('to', end=True)
+    if start_time is not None:
+        query = query.filter(Show.start_time >= start_time)
+    if end_time is not None:
+        query = query.filter(Show.start_time < end_time)
+
+    return query
+
+def show_summaries(rows):
+    '''
+    Formats show listing rows as they are read.
+
+    Parameters:
+        rows (iter): Rows of shows_query.
+    Returns:
+        shows (iter): The show details.
+    '''
+
+    return ({
+        "venue_id": show.venue_id,
+        "venue_name": show.venue_name,
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link,
+        "start_time": show.start_time
+    } for show in rows)
+
+def get_shows(stream=False, date_format=None):
+    '''
+    Lists a page of shows with their venue and artist.
+
+    Parameters:
+        stream (bool): Yield the shows while they are read instead of
+            returning a list, see keyset_paginate.
+        date_format (str): Format the start times for display, None keeps
+            the datetimes.
+    Returns:
+        shows (iter): The show details.
+        page (dict): The previous/next page urls.
+    '''
+
+    page = keyset_paginate(shows_query(), Show, SHOWS_KEY, stream=stream)
+    shows = show_summaries(page["items"])
+    if date_format is not None:
+        shows = format_start_times_in_batches(shows, date_format)
+
+    return (shows if stream else list(shows)), page
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+@app.route('/')
+def index():
+  return render_template('pages/home.html')
+
+#  Venues
+#  ----------------------------------------------------------------
+
+@app.route('/venues')
+@cache.cached
+@replica_router.read_only
+def venues():
+    areas, page = get_venue_areas()
+
+    return render_template('pages/venues.html', areas=areas, page=page)
+
+@app.route('/venues/search', methods=['POST'])
+@replica_router.read_only
+def search_venues():
+    search_term = request.form.get('search_term', '').lower()
+    venues_search = search_by_name(Venue, search_term)
+
+    results = {
+      "count": len(venues_search),
+      "data": [{
+          "id": venue_id,
+          "name": name,
+          "num_upcoming_shows": num_upcoming_shows,
+      } for venue_id, name, num_upcoming_shows in venues_search]
     }
 
+    return render_template('pages/search_venues.html', results=results, search_term=search_term)
+
+@app.route('/venues/available')
+@replica_router.read_only
+def available_venues():
+    areas, page = get_available_venues()
+
+    return render_template('pages/venues.html', areas=areas, page=page,
+                           heading='Venues seeking talent from {} to {}'.format(request.args['from'], request.args['to']))
+
+@app.route('/venues/<int:venue_id>')
+@cache.cached
+@replica_router.read_only
+def show_venue(venue_id):
+    venue_details = get_venue_details(venue_id)
+    format_start_times(venue_details["past_shows"])
+    format_start_times(venue_details["upcoming_shows"])
+
     return render_template('pages/show_venue.html', venue=venue_details)
 
 #  Create Venue
@@ -192,110 +985,71 @@ def create_venue_submission():
         form.populate_obj(venue)
         db.session.add(venue)
         db.session.commit()
+        cache.invalidate('venues')
+        autocomplete.add('venues', venue.id, venue.name)
         flash('Venue ' + venue.name + ' was successfully listed!')
     except Exception:
         flash('An error occurred. Venue ' + request.form.get('name') + ' could not be listed.')
         db.session.rollback()
-    finally:
-        db.session.close()
 
     return render_template('pages/home.html')
 
 @app.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
-    venue = Venue.query.filter_by(id=venue_id).one()
-
     try:
         venue = Venue.query.filter_by(id=venue_id).one()
+        # The venue's shows go with it, so look up the pages listing them and
+        # their artists first.
+        pages = venue_pages(venue.id)
+        artist_ids = [artist_id for artist_id, in db.session.query(Show.artist_id)
+                      .filter(Show.venue_id == venue.id).distinct()]
         db.session.delete(venue)
+        db.session.flush()
+        counters.refresh_counters(Artist, Show.artist_id, ids=artist_ids)
         db.session.commit()
+        invalidate_pages(pages)
+        autocomplete.remove('venues', int(venue_id))
         flash("Venue deleted successfully!")
     except Exception:
         db.session.rollback()
         flash("Venue was not deleted. Something went wrong!")
-    finally:
-        db.session.close()
 
     return redirect(url_for('index'))
 
 #  Artists
 #  ----------------------------------------------------------------
 @app.route('/artists')
+@cache.cached
+@replica_router.read_only
 def artists():
-    artists = Artist.query.all()
-    print(artists)
-
-    artist_details = []
-
-    for artist in artists:
-        artist_details.append({
-          "id": artist.id,
-          "name": artist.name,
-        })
+    artist_details, page = get_artists()
 
-    return render_template('pages/artists.html', artists=artist_details)
+    return render_template('pages/artists.html', artists=artist_details, page=page)
 
 @app.route('/artists/search', methods=['POST'])
+@replica_router.read_only
 def search_artists():
-    search_term = request.form.get('search_term').lower()
-
-    artists_search = Artist.query.filter(Artist.name.ilike('%' + search_term + '%')).all()
+    search_term = request.form.get('search_term', '').lower()
+    artists_search = search_by_name(Artist, search_term)
 
     results = {
       "count": len(artists_search),
       "data": [{
-          "id": artist.id,
-          "name": artist.name,
-          "num_upcoming_shows": len(db.session.query(Show).join(Artist). \
-          filter(Artist.id==artist.id).filter(Show.start_time > datetime.now()).all()),
-      } for artist in artists_search]
+          "id": artist_id,
+          "name": name,
+          "num_upcoming_shows": num_upcoming_shows,
+      } for artist_id, name, num_upcoming_shows in artists_search]
     }
 
     return render_template('pages/search_artists.html', results=results, search_term=search_term)
 
 @app.route('/artists/<int:artist_id>')
+@cache.cached
+@replica_router.read_only
 def show_artist(artist_id):
-    artist = Artist.query.filter_by(id=artist_id).first()
-
-    past_shows_query = db.session.query(Show).join(Artist).filter(Artist.id == artist_id).filter(Show.start_time < datetime.now()).all()
-    upcoming_shows_query = db.session.query(Show).join(Artist).filter(Artist.id == artist_id).filter(Show.start_time > datetime.now()).all()
-
-    past_shows = []
-    upcoming_shows = []
-
-    for show in past_shows_query:
-        past_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-        })
-
-    for show in upcoming_shows_query:
-        upcoming_shows.append({
-          "venue_id": show.venue_id,
-          "venue_name": show.venue.name,
-          "venue_image_link": show.venue.image_link,
-          "start_time": str(show.start_time)
-        })
-
-    artist_details = {
-      "id": artist.id,
-      "name": artist.name,
-      "genres": create_genre_list(artist.genres),
-      "city": artist.city,
-      "state": artist.state,
-      "phone": artist.phone,
-      "website": artist.website_link,
-      "facebook_link": artist.facebook_link,
-      "seeking_venue": artist.seeking_venue,
-      "seeking_description": artist.seeking_description,
-      "image_link": artist.image_link,
-      "past_shows": past_shows,
-      "upcoming_shows": upcoming_shows,
-      "past_shows_count": len(past_shows_query),
-      "upcoming_shows_count": len(upcoming_shows_query)
-    }
+    artist_details = get_artist_details(artist_id)
+    format_start_times(artist_details["past_shows"])
+    format_start_times(artist_details["upcoming_shows"])
 
     return render_template('pages/show_artist.html', artist=artist_details)
 
@@ -328,12 +1082,12 @@ def edit_artist_submission(artist_id):
         artist.seeking_venue = create_boolean_value(artist_details.get('seeking_venue'))
         artist.seeking_description = artist_details.get('seeking_description')
         db.session.commit()
+        invalidate_pages(artist_pages(artist_id))
+        autocomplete.add('artists', artist_id, artist_details.get('name'))
         flash('Artist ' + request.form['name'] + ' was successfully updated!')
     except Exception:
         db.session.rollback()
         flash('Artist ' + request.form['name'] + ' was not updated. Something went wrong.')
-    finally:
-        db.session.close()
 
     return redirect(url_for('show_artist', artist_id=artist_id))
 
@@ -365,12 +1119,12 @@ def edit_venue_submission(venue_id):
         venue.seeking_talent = create_boolean_value(venue_details.get("seeking_talent"))
         venue.seeking_description = venue_details.get("seeking_description")
         db.session.commit()
+        invalidate_pages(venue_pages(venue_id))
+        autocomplete.add('venues', venue_id, venue_details.get('name'))
         flash('Venue ' + venue_details.get('name') + ' was successfully updated!')
     except Exception:
         db.session.rollback()
         flash('Venue ' + venue_details.get('name') + ' was not updated. Something went wrong.')
-    finally:
-        db.session.close()
 
     return redirect(url_for('show_venue', venue_id=venue_id))
 
@@ -391,12 +1145,12 @@ def create_artist_submission():
         form.populate_obj(artist)
         db.session.add(artist)
         db.session.commit()
+        cache.invalidate('artists')
+        autocomplete.add('artists', artist.id, artist.name)
         flash('Artist ' + artist.name + ' was successfully listed!')
     except Exception:
         flash('An error occurred. Artist ' + request.form.get('name') + ' could not be listed.')
         db.session.rollback()
-    finally:
-        db.session.close()
 
     return render_template('pages/home.html')
 
@@ -405,21 +1159,13 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 @app.route('/shows')
+@cache.cached
+@replica_router.read_only
 def shows():
-    show_details = []
-    shows = Show.query.order_by('venue_id').all()
-
-    for show in shows:
-        show_details.append({
-            "venue_id": show.venue.id,
-            "venue_name": show.venue.name,
-            "artist_id": show.artist.id,
-            "artist_name": show.artist.name,
-            "artist_image_link": show.artist.image_link,
-            "start_time": str(show.start_time)
-        })
+    # The shows are rendered while they are read.
+    show_details, page = get_shows(stream=True, date_format='full')
 
-    return render_template('pages/shows.html', shows=show_details)
+    return stream_template('pages/shows.html', shows=show_details, page=page)
 
 @app.route('/shows/create')
 def create_shows():
@@ -428,24 +1174,188 @@ def create_shows():
 
 @app.route('/shows/create', methods=['POST'])
 def create_show_submission():
-    form = ShowForm(request.form)
+    # The forms are not CSRF protected, the templates have no token.
+    form = ShowForm(request.form, meta={'csrf': False})
+
+    if not form.validate():
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error)
+        return render_template('forms/new_show.html', form=form), 400
+
+    conflict = find_booking_conflict(int(form.venue_id.data), form.start_time.data, form.duration.data)
+    if conflict is not None:
+        flash(booking_conflict_message(conflict))
+        return render_template('forms/new_show.html', form=form), 409
 
     try:
         show = Show()
         form.populate_obj(show)
         db.session.add(show)
+        counters.count_new_show(show)
         db.session.commit()
+        cache.invalidate('venues')
+        cache.invalidate('shows')
+        cache.invalidate('show_venue', venue_id=show.venue_id)
+        cache.invalidate('show_artist', artist_id=show.artist_id)
         flash('Show was successfully listed!')
+    except IntegrityError as error:
+        db.session.rollback()
+        # Booked at the same time by a concurrent request.
+        conflict = None
+        if getattr(error.orig, 'pgcode', None) == EXCLUSION_VIOLATION:
+            conflict = find_booking_conflict(int(form.venue_id.data), form.start_time.data, form.duration.data)
+        if conflict is None:
+            flash('An error occurred. Show could not be listed.')
+            return render_template('pages/home.html')
+        flash(booking_conflict_message(conflict))
+        return render_template('forms/new_show.html', form=form), 409
     except Exception:
         db.session.rollback()
         flash('An error occurred. Show could not be listed.')
-    finally:
-        db.session.close()
 
     return render_template('pages/home.html')
 
+@app.route('/autocomplete/<any(artists, venues):kind>')
+@replica_router.read_only
+def autocomplete_names(kind):
+    prefix = request.args.get('q', '').strip()
+    matches = []
+
+    if prefix:
+        matches = autocomplete.search(kind, prefix)
+        if matches is None:
+            matches = autocomplete_from_database(INDEXED_MODELS[kind], prefix)
+
+    results = [{"id": match_id, "name": name} for match_id, name in matches]
+
+    return Response(json.dumps({"results": results}), mimetype='application/json')
+
+#  Export
+#  ----------------------------------------------------------------
+
+@app.route('/export/<any(venues, artists, shows):kind>')
+@replica_router.read_only
+def export(kind):
+    file_format = request.args.get('format', 'csv')
+    if file_format not in ('csv', 'ndjson'):
+        abort(400)
+
+    query = commands.export_query(
+        kind,
+        city=request.args.get('city'),
+        state=request.args.get('state'),
+        start=get_date_arg('from'),
+        end=get_date_arg('to', end=True)
+    )
+    chunks = commands.export_chunks(query, file_format, app.config['STREAM_BATCH_SIZE'])
+
+    response = Response(
+        stream_with_context(chunks),
+        mimetype='text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(kind, file_format)
+
+    return response
+
+#  API
+#  ----------------------------------------------------------------
+
+def api_response(data):
+    '''
+    Serializes data to a JSON response supporting conditional GET.
+
+    The strong ETag is a hash of the serialized rows, so a client sending
+    it back in If-None-Match gets an empty 304 while the data is unchanged.
+
+    Parameters:
+        data (obj): The data to serialize.
+    Returns:
+        response (obj): The JSON response, or a 304.
+    '''
+
+    body = json.dumps(data, separators=(',', ':'), default=json_default)
+    response = Response(body, mimetype='application/json')
+    response.set_etag(hashlib.sha1(body.encode('utf-8')).hexdigest())
+
+    return response.make_conditional(request)
+
+def json_default(value):
+    '''
+    Serializes the values the json module does not know.
+
+    Parameters:
+        value (obj): The value to serialize.
+    Returns:
+        The ISO 8601 string of a date.
+    '''
+
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(value).__name__))
+
+@app.route('/api/v1/venues')
+@replica_router.read_only
+def api_venues():
+    areas, page = get_venue_areas()
+
+    return api_response({"areas": areas, "prev": page["prev_url"], "next": page["next_url"]})
+
+@app.route('/api/v1/venues/available')
+@replica_router.read_only
+def api_available_venues():
+    areas, page = get_available_venues()
+
+    return api_response({"areas": areas, "prev": page["prev_url"], "next": page["next_url"]})
+
+@app.route('/api/v1/venues/<int:venue_id>')
+@replica_router.read_only
+def api_venue(venue_id):
+    return api_response(get_venue_details(venue_id))
+
+@app.route('/api/v1/artists')
+@replica_router.read_only
+def api_artists():
+    artists, page = get_artists()
+
+    return api_response({"artists": artists, "prev": page["prev_url"], "next": page["next_url"]})
+
+@app.route('/api/v1/artists/<int:artist_id>')
+@replica_router.read_only
+def api_artist(artist_id):
+    return api_response(get_artist_details(artist_id))
+
+@app.route('/api/v1/shows')
+@replica_router.read_only
+def api_shows():
+    shows, page = get_shows()
+
+    return api_response({"shows": shows, "prev": page["prev_url"], "next": page["next_url"]})
+
+#  Status
+#  ----------------------------------------------------------------
+
+@app.route('/status/pool')
+def database_pool_status():
+    status = pool_status(db.engine)
+    # Tells the workers of a multi-process server apart.
+    status["process"] = os.getpid()
+    replicas = replica_router.engines()
+    if replicas:
+        status["replicas"] = {key: pool_status(engine) for key, engine in replicas.items()}
+
+    return Response(json.dumps(status), mimetype='application/json')
+
+@app.errorhandler(400)
+def bad_request_error(error):
+    if request.path.startswith('/api/'):
+        return Response(json.dumps({"error": error.description}), status=400, mimetype='application/json')
+    return error
+
 @app.errorhandler(404)
 def not_found_error(error):
+    if request.path.startswith('/api/'):
+        return Response(json.dumps({"error": "not found"}), status=404, mimetype='application/json')
     return render_template('errors/404.html'), 404
 
 @app.errorhandler(500)
@@ -0,0 +1,212 @@
+'''
+Optional async serving mode.
+
+    pip install -r requirements-async.txt
+    uvicorn asgi:application --workers 2
+
+The read endpoints of the JSON API run natively on an async SQLAlchemy
+engine (asyncpg), so a worker keeps serving while they wait on the
+database, and the detail endpoints run their queries concurrently. Every
+other request, the HTML views and the writes, goes to the Flask app run in
+a thread pool. The WSGI deployment of app.py is unchanged.
+'''
+
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import asyncio
+from a2wsgi import WSGIMiddleware
+from flask import request, abort
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.exceptions import HTTPException
+from compression import compress
+from app import (
+    app, Venue, Artist, Show, api_response, keyset_arguments, keyset_query, keyset_rows,
+    VENUE_AREAS_KEY, venue_areas_query, group_venue_areas, venue_schedule_query, venue_details,
+    ARTISTS_KEY, artists_query, artist_summaries, artist_schedule_query, artist_details,
+    SHOWS_KEY, shows_query, show_summaries, past_shows_count_query
+)
+
+#----------------------------------------------------------------------------#
+# Async engine.
+#----------------------------------------------------------------------------#
+
+def create_engine_from_config(config):
+    '''
+    Creates the asyncpg engine of the primary database.
+
+    The pool is sized like the sync one. The server settings passed to
+    psycopg2 as -c options are passed to asyncpg as server_settings.
+
+    Parameters:
+        config (dict): The app config.
+    Returns:
+        engine (obj): The AsyncEngine.
+    '''
+
+    url = make_url(config['SQLALCHEMY_DATABASE_URI']).set(drivername='postgresql+asyncpg')
+    options = dict(config['SQLALCHEMY_ENGINE_OPTIONS'])
+    options.pop('poolclass', None)
+    connect_args = options.pop('connect_args', {})
+
+    server_settings = {}
+    if 'application_name' in connect_args:
+        server_settings['application_name'] = connect_args['application_name']
+    for option in connect_args.get('options', '').split('-c '):
+        if '=' in option:
+            name, value = option.strip().split('=', 1)
+            server_settings[name] = value
+
+    return create_async_engine(url, connect_args={'server_settings': server_settings}, **options)
+
+engine = create_engine_from_config(app.config)
+
+async def fetch_all(statement):
+    # One connection per statement, so statements can run concurrently.
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).all()
+
+async def fetch_first(statement):
+    async with engine.connect() as connection:
+        return (await connection.execute(statement)).first()
+
+async def keyset_paginate(query, model, key_columns):
+    '''
+    Async version of app.keyset_paginate, without streaming.
+    '''
+
+    limit, after, before = keyset_arguments()
+    cursor_id = before if before is not None else after
+    cursor = None
+
+    if cursor_id is not None:
+        cursor = await fetch_first(select(*key_columns).where(model.id == cursor_id))
+
+    backwards = cursor is not None and before is not None
+    query = keyset_query(query, key_columns, cursor, backwards, limit)
+    page = {"items": [], "prev_url": None, "next_url": None}
+
+    fetched = await fetch_all(query.statement)
+    page["items"] = list(keyset_rows(page, fetched, limit, cursor is not None, backwards))
+
+    return page
+
+#----------------------------------------------------------------------------#
+# Async views.
+#----------------------------------------------------------------------------#
+
+# The queries and the formatting are the ones of the sync views in app.py.
+
+async def api_venues():
+    page = await keyset_paginate(venue_areas_query(), Venue, VENUE_AREAS_KEY)
+
+    return {"areas": group_venue_areas(page["items"]), "prev": page["prev_url"], "next": page["next_url"]}
+
+async def api_venue(venue_id):
+    venue, schedule, past_shows_count = await asyncio.gather(
+        fetch_first(select(Venue.__table__).where(Venue.id == venue_id)),
+        fetch_all(venue_schedule_query(venue_id).statement),
+        fetch_first(past_shows_count_query('venue_id', venue_id))
+    )
+    if venue is None:
+        abort(404)
+
+    return venue_details(venue, schedule, past_shows_count[0])
+
+async def api_artists():
+    page = await keyset_paginate(artists_query(), Artist, ARTISTS_KEY)
+
+    return {"artists": artist_summaries(page["items"]), "prev": page["prev_url"], "next": page["next_url"]}
+
+async def api_artist(artist_id):
+    artist, schedule, past_shows_count = await asyncio.gather(
+        fetch_first(select(Artist.__table__).where(Artist.id == artist_id)),
+        fetch_all(artist_schedule_query(artist_id).statement),
+        fetch_first(past_shows_count_query('artist_id', artist_id))
+    )
+    if artist is None:
+        abort(404)
+
+    return artist_details(artist, schedule, past_shows_count[0])
+
+async def api_shows():
+    page = await keyset_paginate(shows_query(), Show, SHOWS_KEY)
+
+    return {"shows": list(show_summaries(page["items"])), "prev": page["prev_url"], "next": page["next_url"]}
+
+# Endpoints of app.py served by the async views above.
+ASYNC_VIEWS = {
+    'api_venues': api_venues,
+    'api_venue': api_venue,
+    'api_artists': api_artists,
+    'api_artist': api_artist,
+    'api_shows': api_shows,
+}
+
+#----------------------------------------------------------------------------#
+# ASGI application.
+#----------------------------------------------------------------------------#
+
+wsgi_application = WSGIMiddleware(app, workers=app.config['ASGI_WSGI_THREADS'])
+
+def request_context(scope):
+    '''
+    Builds the Flask request context of an ASGI request, which routes it
+    and gives the async views request, url_for and the error handlers.
+    '''
+
+    headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+
+    return app.test_request_context(
+        scope['path'],
+        base_url='{}://{}{}'.format(scope.get('scheme', 'http'), dict(headers).get('host', 'localhost'),
+                                    scope.get('root_path', '')),
+        method=scope['method'],
+        query_string=scope['query_string'],
+        headers=headers
+    )
+
+async def render(view):
+    # Bypasses the Flask dispatch, so applies its compression itself.
+    try:
+        response = api_response(await view(**request.view_args))
+    except HTTPException as error:
+        response = app.make_response(app.handle_http_exception(error))
+    return compress.compress_response(response)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD'):
+        with request_context(scope):
+            view = ASYNC_VIEWS.get(request.endpoint)
+            if view is not None:
+                response = await render(view)
+                # Drops the body of HEAD requests and 304 responses.
+                body, status, headers = response.get_wsgi_response(request.environ)
+                body = b''.join(body)
+
+        if view is not None:
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split()[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+    await wsgi_application(scope, receive, send)
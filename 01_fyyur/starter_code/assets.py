@@ -0,0 +1,197 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from flask import request, url_for, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#----------------------------------------------------------------------------#
+# Bundles.
+#----------------------------------------------------------------------------#
+
+# Bundle name: source files, relative to the static folder, in load order.
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/font-awesome.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+        'js/script.js',
+    ],
+    'main.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+}
+
+# Built bundles go to static/dist, at the same depth as static/css so the
+# relative urls in the stylesheets still resolve.
+DIST_FOLDER = 'dist'
+MANIFEST = 'manifest.json'
+
+# Built files never change, their name changes with their content.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+COMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+def minify_css(css):
+    '''
+    Removes the comments and the whitespace that CSS does not need.
+    '''
+
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    # Not around ':', which is significant in selectors ('a :hover').
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+
+    return css.strip()
+
+def bundle(static_folder, name, sources):
+    '''
+    Concatenates and minifies the sources of a bundle.
+
+    Scripts are only concatenated: the libraries are already minified and
+    the app's own scripts are a few lines long.
+
+    Returns:
+        content (bytes): The bundle.
+    '''
+
+    parts = []
+
+    for source in sources:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as file:
+            content = file.read()
+        if name.endswith('.css'):
+            parts.append(minify_css(content))
+        else:
+            # Drops the source map comment, the maps are not bundled.
+            content = re.sub(r'^//[#@] sourceMappingURL=.*$', '', content, flags=re.M)
+            parts.append(content.strip().rstrip(';') + ';')
+
+    return '\n'.join(parts).encode('utf-8')
+
+def build_assets(static_folder):
+    '''
+    Builds the bundles as content hashed files, with gzip and, if the
+    brotli package is installed, brotli variants, and writes the manifest
+    mapping each bundle to its built file.
+
+    Parameters:
+        static_folder (str): The app's static folder.
+    Returns:
+        manifest (dict): Bundle name: path of the built file, relative to
+            the static folder.
+    '''
+
+    dist = os.path.join(static_folder, DIST_FOLDER)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+
+    for name, sources in BUNDLES.items():
+        content = bundle(static_folder, name, sources)
+        stem, extension = os.path.splitext(name)
+        filename = '{}.{}{}'.format(stem, hashlib.sha256(content).hexdigest()[:12], extension)
+
+        with open(os.path.join(dist, filename), 'wb') as file:
+            file.write(content)
+        with open(os.path.join(dist, filename + '.gz'), 'wb') as file:
+            file.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(os.path.join(dist, filename + '.br'), 'wb') as file:
+                file.write(brotli.compress(content))
+
+        manifest[name] = '{}/{}'.format(DIST_FOLDER, filename)
+
+    with open(os.path.join(dist, MANIFEST), 'w') as file:
+        json.dump(manifest, file, indent=2)
+
+    return manifest
+
+#----------------------------------------------------------------------------#
+# Flask integration.
+#----------------------------------------------------------------------------#
+
+class Assets:
+    '''
+    Serves the built bundles and gives the templates their urls.
+
+    Without a build (no static/dist/manifest.json) the templates get the
+    source files of each bundle instead, as in development.
+    '''
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.load_manifest()
+
+        app.add_template_global(self.asset_urls)
+        app.add_url_rule('/static/{}/<path:filename>'.format(DIST_FOLDER), 'assets', self.send_asset)
+
+    def load_manifest(self):
+        path = os.path.join(self.app.static_folder, DIST_FOLDER, MANIFEST)
+        try:
+            with open(path) as file:
+                self.manifest = json.load(file)
+        except FileNotFoundError:
+            self.manifest = {}
+
+    def asset_urls(self, name):
+        '''
+        Lists the urls to load for a bundle.
+
+        Parameters:
+            name (str): The bundle name, e.g. 'main.css'.
+        Returns:
+            urls (list): The built bundle, or its sources if not built.
+        '''
+
+        if name in self.manifest:
+            return [url_for('static', filename=self.manifest[name])]
+        return [url_for('static', filename=source) for source in BUNDLES[name]]
+
+    def send_asset(self, filename):
+        # Serves the precompressed variant the client accepts, if built.
+        directory = os.path.join(self.app.static_folder, DIST_FOLDER)
+        path = filename
+        encoding = None
+
+        for name, suffix in COMPRESSED_SUFFIXES:
+            if name in request.accept_encodings and os.path.isfile(os.path.join(directory, filename + suffix)):
+                encoding = name
+                path += suffix
+                break
+
+        response = send_from_directory(directory, path, mimetype=mimetypes.guess_type(filename)[0],
+                                       download_name=os.path.basename(filename))
+        if encoding is not None:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+
+        return response
+
+assets = Assets()
@@ -0,0 +1,233 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy.exc import SQLAlchemyError
+from models import app, db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Name prefix index.
+#----------------------------------------------------------------------------#
+
+INDEXED_MODELS = {'artists': Artist, 'venues': Venue}
+
+WORD_START = re.compile(r'(?<!\w)\w')
+
+def normalize(name):
+    '''
+    Case folds a name and collapses its whitespace.
+    '''
+
+    return ' '.join(name.casefold().split())
+
+class PrefixIndex:
+    '''
+    Names searchable by the prefix of any of their words.
+
+    Each word start of a name is a key, e.g. 'the beatles' and 'beatles'
+    for The Beatles, and the keys are kept sorted: the names starting with
+    a prefix are found by bisecting it, then reading the keys up to the
+    first one not starting with it.
+    '''
+
+    def __init__(self, rows=()):
+        self.names = {}
+        self.keys = []
+
+        for record_id, name in rows:
+            if name:
+                self.names[record_id] = name
+                self.keys.extend(self.name_keys(record_id, name))
+        self.keys.sort()
+
+    def name_keys(self, record_id, name):
+        name = normalize(name)
+        return [(name[match.start():], record_id) for match in WORD_START.finditer(name)]
+
+    def add(self, record_id, name):
+        '''
+        Adds a name, or replaces the name of record_id.
+        '''
+
+        self.remove(record_id)
+        if not name:
+            return
+
+        self.names[record_id] = name
+        for key in self.name_keys(record_id, name):
+            insort(self.keys, key)
+
+    def remove(self, record_id):
+        name = self.names.pop(record_id, None)
+        if name is None:
+            return
+
+        for key in self.name_keys(record_id, name):
+            position = bisect_left(self.keys, key)
+            if position < len(self.keys) and self.keys[position] == key:
+                del self.keys[position]
+
+    def search(self, prefix, limit):
+        '''
+        Finds the names with a word starting with a prefix.
+
+        Parameters:
+            prefix (str): The typed prefix.
+            limit (int): The maximum number of names.
+        Returns:
+            matches (list): (id, name) tuples, ordered by the matched words.
+        '''
+
+        prefix = normalize(prefix)
+        matches = {}
+        # (prefix,) sorts before every (key, id) with key >= prefix.
+        position = bisect_left(self.keys, (prefix,))
+
+        while position < len(self.keys) and len(matches) < limit:
+            key, record_id = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            matches.setdefault(record_id, self.names[record_id])
+            position += 1
+
+        return list(matches.items())
+
+#----------------------------------------------------------------------------#
+# Autocomplete.
+#----------------------------------------------------------------------------#
+
+class Autocomplete:
+    '''
+    In-process prefix indexes of the artist and venue names.
+
+    The indexes are loaded when the app starts and kept up to date by the
+    views creating, editing and deleting artists and venues. Changes made
+    by other processes (other workers, the CLI) are picked up when the
+    index is reloaded, every AUTOCOMPLETE_REFRESH_INTERVAL seconds. The
+    changes made while a reload reads the names are applied again to the
+    new index, which may have read the table before they were committed.
+    '''
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.indexes = {}
+        self.loaded_at = {}
+        # Changes made during a reload, by kind.
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.loading = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('AUTOCOMPLETE_ENABLED', True)
+        self.limit = app.config.get('AUTOCOMPLETE_LIMIT', 10)
+        self.refresh_interval = app.config.get('AUTOCOMPLETE_REFRESH_INTERVAL', 300)
+
+        if self.enabled:
+            with app.app_context():
+                self.warm(app)
+
+    def warm(self, app):
+        '''
+        Loads the indexes. Without a usable database (e.g. before the
+        migrations ran) they are left to the first autocomplete request.
+        '''
+
+        try:
+            for kind in INDEXED_MODELS:
+                self.load(kind)
+        except SQLAlchemyError as error:
+            app.logger.warning('autocomplete index not loaded: %s', error)
+        finally:
+            db.session.remove()
+
+    def load(self, kind):
+        model = INDEXED_MODELS[kind]
+
+        with self.lock:
+            self.pending[kind] = []
+        try:
+            index = PrefixIndex(db.session.query(model.id, model.name))
+        except Exception:
+            with self.lock:
+                del self.pending[kind]
+            raise
+
+        with self.lock:
+            for change in self.pending.pop(kind):
+                if change[0] == 'add':
+                    index.add(*change[1:])
+                else:
+                    index.remove(*change[1:])
+            self.indexes[kind] = index
+            self.loaded_at[kind] = time.monotonic()
+
+    def index(self, kind):
+        '''
+        Returns the index of artists or venues, (re)loading it if missing or
+        older than the refresh interval.
+
+        Returns:
+            index (obj): The PrefixIndex, None if disabled or being loaded
+                for the first time by another thread.
+        '''
+
+        if not self.enabled:
+            return None
+
+        index = self.indexes.get(kind)
+        if index is None or time.monotonic() - self.loaded_at[kind] > self.refresh_interval:
+            # One thread loads, the others keep using the previous index.
+            if self.loading.acquire(blocking=False):
+                try:
+                    self.load(kind)
+                finally:
+                    self.loading.release()
+                index = self.indexes[kind]
+
+        return index
+
+    def search(self, kind, prefix):
+        '''
+        Finds the artists or venues with a word of their name starting with
+        a prefix.
+
+        Parameters:
+            kind (str): artists or venues.
+            prefix (str): The typed prefix.
+        Returns:
+            matches (list): (id, name) tuples, None if the index is not
+                available and the database must be searched instead.
+        '''
+
+        index = self.index(kind)
+        if index is None:
+            return None
+
+        with self.lock:
+            return index.search(prefix, self.limit)
+
+    def add(self, kind, record_id, name):
+        '''
+        Adds a created artist or venue, or renames an edited one.
+        '''
+
+        with self.lock:
+            if kind in self.pending:
+                self.pending[kind].append(('add', record_id, name))
+            if kind in self.indexes:
+                self.indexes[kind].add(record_id, name)
+
+    def remove(self, kind, record_id):
+        with self.lock:
+            if kind in self.pending:
+                self.pending[kind].append(('remove', record_id))
+            if kind in self.indexes:
+                self.indexes[kind].remove(record_id)
+
+autocomplete = Autocomplete(app)
@@ -0,0 +1,224 @@
+'''
+Times every read view of the app through the Flask test client.
+
+Fill the database first, e.g. with "flask seed --truncate", then record a
+baseline and compare later runs against it:
+
+    python benchmark.py --output benchmarks/baseline.json
+    python benchmark.py --compare benchmarks/baseline.json
+
+The write handlers are left out since they would change the dataset
+between runs.
+'''
+
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+import click
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+from models import db, Venue, Artist, Show
+from cache import cache
+from monitoring import query_monitor
+
+#----------------------------------------------------------------------------#
+# Helper functions.
+#----------------------------------------------------------------------------#
+
+def percentile(values, percent):
+    '''
+    Returns the nearest-rank percentile of a list of numbers.
+    '''
+
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, math.ceil(percent / 100.0 * len(values)) - 1))
+    return values[rank]
+
+def benchmark_routes():
+    '''
+    Lists the routes to time, using the busiest venue and artist.
+
+    Returns:
+        routes (list): (name, method, url, form data) tuples.
+    '''
+
+    venue_id = db.session.query(Show.venue_id).group_by(Show.venue_id) \
+        .order_by(db.func.count(Show.id).desc()).limit(1).scalar() \
+        or db.session.query(db.func.min(Venue.id)).scalar()
+    artist_id = db.session.query(Show.artist_id).group_by(Show.artist_id) \
+        .order_by(db.func.count(Show.id).desc()).limit(1).scalar() \
+        or db.session.query(db.func.min(Artist.id)).scalar()
+    venue_name = db.session.query(Venue.name).filter(Venue.id == venue_id).scalar() or 'a'
+    artist_name = db.session.query(Artist.name).filter(Artist.id == artist_id).scalar() or 'a'
+    # The coming week for the availability search, the coming month for the
+    # show export.
+    today = datetime.now().date()
+    week = 'from={}&to={}'.format(today, today + timedelta(days=7))
+    month = 'from={}&to={}'.format(today, today + timedelta(days=30))
+
+    return [
+        ('index', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('available_venues', 'GET', '/venues/available?' + week, None),
+        ('search_venues', 'POST', '/venues/search', {'search_term': venue_name.split()[0]}),
+        ('show_venue', 'GET', '/venues/{}'.format(venue_id), None),
+        ('create_venue_form', 'GET', '/venues/create', None),
+        ('edit_venue', 'GET', '/venues/{}/edit'.format(venue_id), None),
+        ('artists', 'GET', '/artists', None),
+        ('search_artists', 'POST', '/artists/search', {'search_term': artist_name.split()[0]}),
+        ('show_artist', 'GET', '/artists/{}'.format(artist_id), None),
+        ('create_artist_form', 'GET', '/artists/create', None),
+        ('edit_artist', 'GET', '/artists/{}/edit'.format(artist_id), None),
+        ('shows', 'GET', '/shows', None),
+        ('create_shows', 'GET', '/shows/create', None),
+        ('autocomplete_venues', 'GET', '/autocomplete/venues?' + urlencode({'q': venue_name.split()[0][:3]}), None),
+        ('autocomplete_artists', 'GET', '/autocomplete/artists?' + urlencode({'q': artist_name.split()[0][:3]}), None),
+        ('export_venues', 'GET', '/export/venues?format=csv', None),
+        ('export_artists', 'GET', '/export/artists?format=ndjson', None),
+        ('export_shows', 'GET', '/export/shows?format=csv&' + month, None),
+        ('api_venues', 'GET', '/api/v1/venues', None),
+        ('api_venue', 'GET', '/api/v1/venues/{}'.format(venue_id), None),
+        ('api_artists', 'GET', '/api/v1/artists', None),
+        ('api_artist', 'GET', '/api/v1/artists/{}'.format(artist_id), None),
+        ('api_shows', 'GET', '/api/v1/shows', None),
+    ]
+
+def time_route(client, method, url, data, iterations, counter):
+    '''
+    Requests a route repeatedly.
+
+    Returns:
+        result (dict): Status, queries per request and latencies in ms.
+    '''
+
+    latencies = []
+    queries = []
+
+    # One warm-up request so that template compilation is not measured.
+    client.open(url, method=method, data=data).get_data()
+
+    for _ in range(iterations):
+        counter[0] = 0
+        start = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        response.get_data()
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(counter[0])
+
+    return {
+        "url": url,
+        "status": response.status_code,
+        "queries": max(queries),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+    }
+
+def compare(results, baseline, tolerance):
+    '''
+    Prints the results next to a baseline.
+
+    Returns:
+        regressions (list): Names of the routes that got slower than the
+            tolerance allows or issue more queries.
+    '''
+
+    regressions = []
+
+    click.echo('{:<20} {:>10} {:>10} {:>8} {:>10}'.format('route', 'p95 ms', 'baseline', 'change', 'queries'))
+    for name, result in results["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            click.echo('{:<20} {:>10} {:>10}'.format(name, result["p95_ms"], 'new'))
+            continue
+
+        change = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        regressed = change > tolerance or result["queries"] > before["queries"]
+        if regressed:
+            regressions.append(name)
+        click.echo('{:<20} {:>10} {:>10} {:>+7.0%} {:>4} ({:>3}){}'.format(
+            name, result["p95_ms"], before["p95_ms"], change,
+            result["queries"], before["queries"], '  REGRESSION' if regressed else ''))
+
+    return regressions
+
+#----------------------------------------------------------------------------#
+# Launch.
+#----------------------------------------------------------------------------#
+
+@click.command()
+@click.option('--iterations', '-n', default=50, show_default=True, help='Timed requests per route.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False),
+              help='A previous --output to compare against.')
+@click.option('--tolerance', default=0.2, show_default=True,
+              help='Allowed p95 slowdown against the baseline, 0.2 is 20%.')
+@click.option('--cache/--no-cache', 'use_cache', default=False, show_default=True,
+              help='Serve the read views from the page cache.')
+def main(iterations, output, baseline_path, tolerance, use_cache):
+    '''
+    Times every read view and records query counts and p50/p95 latencies.
+    '''
+
+    cache.enabled = use_cache
+    query_monitor.enabled = False
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    counter = [0]
+
+    def count_query(*args):
+        counter[0] += 1
+
+    event.listen(Engine, 'before_cursor_execute', count_query)
+    client = app.test_client()
+
+    with app.app_context():
+        routes = benchmark_routes()
+        rows = {
+            "venues": db.session.query(db.func.count(Venue.id)).scalar(),
+            "artists": db.session.query(db.func.count(Artist.id)).scalar(),
+            "shows": db.session.query(db.func.count(Show.id)).scalar(),
+        }
+        db.session.remove()
+
+    results = {
+        "created": datetime.now().isoformat(timespec='seconds'),
+        "iterations": iterations,
+        "cache": use_cache,
+        "rows": rows,
+        "routes": {},
+    }
+
+    for name, method, url, data in routes:
+        result = time_route(client, method, url, data, iterations, counter)
+        results["routes"][name] = result
+        if not baseline_path:
+            click.echo('{:<20} {:>4} {:>4} queries  p50 {:>9.3f}ms  p95 {:>9.3f}ms'.format(
+                name, result["status"], result["queries"], result["p50_ms"], result["p95_ms"]))
+
+    if output:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+        if baseline.get("rows") != rows:
+            click.echo('warning: the baseline was recorded on a different dataset {}'.format(baseline.get("rows")), err=True)
+        if compare(results, baseline, tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from models import db, Show
+
+#----------------------------------------------------------------------------#
+# Venue bookings.
+#----------------------------------------------------------------------------#
+
+# A venue hosts one show at a time, which the ex_show_venue_booking
+# constraint enforces. The web form and "flask import" check new shows
+# here first to tell which show is in the way.
+
+# SQLSTATE of the rows rejected by an exclusion constraint.
+EXCLUSION_VIOLATION = '23P01'
+
+def booked_between(start_time, end_time):
+    '''
+    Builds the condition on the shows booking their venue at some time
+    between two datetimes.
+
+    It is the condition of the ex_show_venue_booking constraint, so with
+    the venue id it is answered from the GiST index of the constraint.
+
+    Parameters:
+        start_time (obj): The start of the period.
+        end_time (obj): The end of the period, excluded.
+    Returns:
+        condition (obj): The filter on Show.
+    '''
+
+    return db.func.tsrange(Show.start_time, Show.end_time).op('&&')(db.func.tsrange(start_time, end_time))
+
+def find_booking_conflict(venue_id, start_time, duration):
+    '''
+    Finds a show booked at a venue at a time overlapping a new show.
+
+    Parameters:
+        venue_id (int): The venue of the new show.
+        start_time (obj): The start of the new show.
+        duration (obj): The timedelta the new show lasts.
+    Returns:
+        show (obj): The first overlapping Show, with its artist loaded, None
+            if the venue is free.
+    '''
+
+    return Show.query.options(db.joinedload(Show.artist)) \
+        .filter(Show.venue_id == venue_id) \
+        .filter(booked_between(start_time, start_time + duration)) \
+        .order_by(Show.start_time).first()
+
+def booking_conflict_message(show):
+    '''
+    Describes the show a new show overlaps, for the user or the import log.
+
+    Parameters:
+        show (obj): The overlapping Show, from find_booking_conflict.
+    Returns:
+        message (str): When the venue is booked and by which artist.
+    '''
+
+    return 'The venue is already booked from {} to {} for a show of {} (show {}).'.format(
+        show.start_time.strftime('%Y-%m-%d %H:%M'), show.end_time.strftime('%Y-%m-%d %H:%M'),
+        show.artist.name, show.id)
+
+def find_batch_conflicts(rows):
+    '''
+    Finds the imported shows overlapping a booked show or an earlier show
+    of the same batch at their venue.
+
+    The batch is checked against the database with one query, joining its
+    rows to the shows they overlap.
+
+    Parameters:
+        rows (list): (line number, column value dict) pairs of valid shows.
+    Returns:
+        errors (dict): Error messages keyed by line number.
+    '''
+
+    if not rows:
+        return {}
+
+    candidates = db.values(
+        db.column('line_number', db.Integer), db.column('venue_id', db.Integer),
+        db.column('start_time', db.DateTime), db.column('end_time', db.DateTime),
+        name='candidate'
+    ).data([
+        (line_number, data['venue_id'], data['start_time'], data['start_time'] + data['duration'])
+        for line_number, data in rows
+    ])
+
+    booked = db.session.query(candidates.c.line_number, Show) \
+        .join(Show, db.and_(Show.venue_id == candidates.c.venue_id,
+                            booked_between(candidates.c.start_time, candidates.c.end_time))) \
+        .options(db.joinedload(Show.artist)) \
+        .order_by(candidates.c.line_number, Show.start_time).all()
+
+    errors = {}
+    for line_number, show in booked:
+        errors.setdefault(line_number, booking_conflict_message(show))
+
+    accepted = {}
+    for line_number, data in rows:
+        if line_number in errors:
+            continue
+        start_time, end_time = data['start_time'], data['start_time'] + data['duration']
+        for other_line, other_start, other_end in accepted.get(data['venue_id'], []):
+            if start_time < other_end and other_start < end_time:
+                errors[line_number] = 'The venue is already booked at that time by the show of line {}.'.format(other_line)
+                break
+        else:
+            accepted.setdefault(data['venue_id'], []).append((line_number, start_time, end_time))
+
+    return errors
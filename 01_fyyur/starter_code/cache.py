@@ -0,0 +1,233 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import wraps
+from flask import g, request, session, Response
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+class CacheBackend(ABC):
+    '''
+    Interface of a cache backend.
+
+    A shared backend (memcached, redis, ...) or a test stand-in only has to
+    implement these methods to be passed to ResponseCache.init_app.
+    '''
+
+    @abstractmethod
+    def get(self, key):
+        '''
+        Returns the value stored under key, or None if missing or expired.
+        '''
+
+    @abstractmethod
+    def set(self, key, value):
+        '''
+        Stores value under key.
+        '''
+
+    @abstractmethod
+    def delete(self, key):
+        '''
+        Removes key if present.
+        '''
+
+    @abstractmethod
+    def clear(self):
+        '''
+        Removes every key.
+        '''
+
+class LRUCache(CacheBackend):
+    '''
+    In-process least recently used cache bounded by size and age.
+    '''
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+def namespace(endpoint, **view_args):
+    '''
+    Builds the cache namespace of a view.
+
+    Parameters:
+        endpoint (str): The view endpoint, e.g. 'show_venue'.
+        view_args (dict): The url arguments, e.g. venue_id=1.
+    Returns:
+        namespace (str): e.g. 'show_venue(venue_id=1)'.
+    '''
+
+    args = ','.join('{}={}'.format(name, view_args[name]) for name in sorted(view_args))
+    return '{}({})'.format(endpoint, args)
+
+class ResponseCache:
+    '''
+    Caches rendered GET responses of read views.
+
+    Every view namespace (endpoint plus url arguments) has a version token
+    that is part of its keys, so invalidating a namespace drops all of its
+    cached pages (every page and filter of a listing) at once, on any
+    backend, without having to enumerate keys.
+
+    With read replicas, a page rendered from a lagging replica must not be
+    served in place of the user's own changes: the cache is bypassed while
+    the user sticks to the primary, and pages missed within
+    REPLICA_STICKINESS seconds of an invalidation are rendered from the
+    primary, so the stale replica data is not cached under the new version.
+    '''
+
+    def __init__(self, app=None, backend=None):
+        self.backend = None
+        self.enabled = False
+        if app is not None:
+            self.init_app(app, backend)
+
+    def init_app(self, app, backend=None):
+        '''
+        Configures the cache from the app config.
+
+        Parameters:
+            app (obj): The Flask app.
+            backend (obj): A CacheBackend, defaults to an LRUCache sized
+                by CACHE_MAX_ENTRIES and CACHE_TTL.
+        '''
+
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.backend = backend or LRUCache(
+            max_entries=app.config.get('CACHE_MAX_ENTRIES', 1024),
+            ttl=app.config.get('CACHE_TTL', 60)
+        )
+        self.primary_window = app.config.get('REPLICA_STICKINESS', 5)
+
+    def _new_version(self):
+        # The invalidation time travels with the token so that every
+        # process sharing the backend knows how recent it is.
+        return '{}@{}'.format(uuid.uuid4().hex, time.time())
+
+    def _version(self, ns):
+        version_key = 'version:' + ns
+        version = self.backend.get(version_key)
+        if version is None:
+            # Never reuse a token: entries written under an evicted or
+            # expired version must stay unreachable.
+            version = self._new_version()
+            self.backend.set(version_key, version)
+        return version
+
+    def invalidate(self, endpoint, **view_args):
+        '''
+        Drops every cached response of a view namespace.
+
+        Parameters:
+            endpoint (str): The view endpoint.
+            view_args (dict): The url arguments of the view.
+        '''
+
+        if self.backend is not None:
+            self.backend.set('version:' + namespace(endpoint, **view_args), self._new_version())
+
+    def cached(self, view):
+        '''
+        Decorates a view so its GET responses are served from the cache.
+
+        Responses are not cached or served from the cache while the user
+        has flashed messages pending, since those are part of the page, nor
+        while the user reads from the primary after writing.
+        '''
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled or request.method != 'GET' or session.get('_flashes') \
+                    or session.get('primary_until', 0) > time.time():
+                return view(*args, **kwargs)
+
+            ns = namespace(request.endpoint, **(request.view_args or {}))
+            version = self._version(ns)
+            key = '{}:{}:{}'.format(ns, version, request.full_path)
+
+            hit = self.backend.get(key)
+            if hit is not None:
+                data, mimetype = hit
+                response = Response(data, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            # A replica may not have replayed the write behind a recent
+            # invalidation yet.
+            invalidated_at = float(version.partition('@')[2] or 0)
+            if time.time() - invalidated_at < self.primary_window:
+                g.pop('replica', None)
+
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response):
+                response = Response(response)
+
+            if response.status_code != 200:
+                return response
+
+            response.headers['X-Cache'] = 'MISS'
+            if response.is_streamed:
+                response.response = self._store_when_done(key, response.response, response.mimetype)
+            else:
+                self.backend.set(key, (response.get_data(), response.mimetype))
+
+            return response
+
+        return wrapper
+
+    def _store_when_done(self, key, chunks, mimetype):
+        # Passes a streamed body through and caches it once fully sent.
+        body = []
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            body.append(chunk)
+            yield chunk
+        self.backend.set(key, (b''.join(body), mimetype))
+
+cache = ResponseCache()
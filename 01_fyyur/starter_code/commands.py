@@ -0,0 +1,639 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+import click
+from werkzeug.datastructures import MultiDict
+from forms import VenueForm, ArtistForm, ShowForm
+from models import app, db, Venue, Artist, Show, ShowArchive, DEFAULT_SHOW_DURATION
+from counters import rollover_counters, repair_counters
+from bookings import find_batch_conflicts
+from assets import build_assets
+
+#----------------------------------------------------------------------------#
+# Helper functions.
+#----------------------------------------------------------------------------#
+
+TRUE_VALUES = ('y', 'yes', 'true', 't', '1')
+
+IMPORT_MODELS = {
+    'venues': (Venue, VenueForm),
+    'artists': (Artist, ArtistForm),
+    'shows': (Show, ShowForm),
+}
+
+def read_rows(file, file_format):
+    '''
+    Reads the rows of a CSV or NDJSON file.
+
+    Parameters:
+        file (obj): The open file.
+        file_format (str): csv or ndjson.
+    Returns:
+        rows (iter): (line number, row dict) pairs.
+    '''
+
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+def to_formdata(row):
+    '''
+    Converts an imported row to the form data the web forms receive.
+
+    Genres may be a list or a ';' separated string, and the seeking_*
+    flags any of y/yes/true/t/1.
+
+    Parameters:
+        row (dict): The imported row.
+    Returns:
+        formdata (obj): The row as a MultiDict.
+    '''
+
+    formdata = MultiDict()
+
+    for key, value in row.items():
+        if value is None:
+            continue
+        if key == 'genres':
+            genres = value.split(';') if isinstance(value, str) else value
+            formdata.setlist(key, [genre.strip() for genre in genres if genre.strip()])
+        elif key.startswith('seeking_') and key != 'seeking_description':
+            formdata[key] = 'y' if str(value).lower() in TRUE_VALUES else ''
+        else:
+            formdata[key] = str(value)
+
+    return formdata
+
+def resolve_show_references(rows):
+    '''
+    Fills in the venue_id/artist_id of show rows and checks they exist.
+
+    Rows may give venue_name/artist_name instead of the ids. Each batch
+    costs one query per referenced table.
+
+    Parameters:
+        rows (list): (line number, row dict) pairs, updated in place.
+    Returns:
+        errors (dict): Error messages keyed by line number.
+        referenced (list): The venues and artists found. Keep them until
+            the batch is validated, ShowForm then finds them in the session
+            instead of querying them again.
+    '''
+
+    errors = {}
+    referenced = []
+
+    for model, key in ((Venue, 'venue'), (Artist, 'artist')):
+        id_key, name_key = key + '_id', key + '_name'
+        ids = {int(row[id_key]) for _, row in rows if str(row.get(id_key) or '').isdigit()}
+        names = {row[name_key] for _, row in rows if not row.get(id_key) and row.get(name_key)}
+
+        found = model.query.filter(db.or_(model.id.in_(ids), model.name.in_(names))).all()
+        referenced.extend(found)
+        known_ids = {record.id for record in found}
+        ids_by_name = {record.name: record.id for record in found}
+
+        for line_number, row in rows:
+            if not row.get(id_key) and row.get(name_key) in ids_by_name:
+                row[id_key] = ids_by_name[row[name_key]]
+            if not str(row.get(id_key) or '').isdigit() or int(row[id_key]) not in known_ids:
+                errors.setdefault(line_number, []).append('unknown {}'.format(key))
+
+    return errors, referenced
+
+def validate_row(model, form_class, row):
+    '''
+    Validates an imported row with the web form of its model.
+
+    Parameters:
+        model (obj): Venue, Artist or Show.
+        form_class (obj): The form validating the model.
+        row (dict): The imported row.
+    Returns:
+        data (dict): The column values, None if the row is invalid.
+        errors (dict): The form errors.
+    '''
+
+    form = form_class(formdata=to_formdata(row), meta={'csrf': False})
+
+    if not form.validate():
+        return None, form.errors
+
+    columns = model.__table__.columns
+    data = {name: value for name, value in form.data.items() if name in columns}
+
+    for name in ('venue_id', 'artist_id'):
+        if name in data:
+            data[name] = int(data[name])
+
+    return data, {}
+
+def copy_value(value):
+    '''
+    Converts a column value to its PostgreSQL COPY CSV representation.
+    '''
+
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple)):
+        return '{' + ','.join(
+            '"' + item.replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value
+        ) + '}'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return '{} seconds'.format(int(value.total_seconds()))
+    return value
+
+def insert_rows(model, rows, use_copy=False):
+    '''
+    Inserts validated rows with one statement.
+
+    Parameters:
+        model (obj): Venue, Artist or Show.
+        rows (list): Column value dicts, all with the same keys.
+        use_copy (bool): Stream the rows with COPY instead of an executemany
+            INSERT.
+    '''
+
+    if not rows:
+        return
+
+    if not use_copy:
+        db.session.execute(model.__table__.insert(), rows)
+        return
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    # Quoted strings keep '' apart from NULL, which COPY reads as unquoted empty.
+    writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        'COPY "{}" ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            model.__tablename__, ', '.join('"{}"'.format(column) for column in columns)),
+        buffer
+    )
+
+def export_query(kind, city=None, state=None, start=None, end=None):
+    '''
+    Builds the query exporting every column of venues, artists or shows.
+
+    Parameters:
+        kind (str): venues, artists or shows.
+        city (str): Only rows in this city (of the venue, for shows).
+        state (str): Only rows in this state (of the venue, for shows).
+        start (obj): Only shows starting at or after this datetime.
+        end (obj): Only shows starting before this datetime.
+    Returns:
+        query (obj): The query, ordered by id.
+    '''
+
+    model = IMPORT_MODELS[kind][0]
+    query = db.session.query(*model.__table__.columns)
+    located = model
+
+    if model is Show:
+        if city or state:
+            query = query.join(Venue, Show.venue_id == Venue.id)
+            located = Venue
+        if start:
+            query = query.filter(Show.start_time >= start)
+        if end:
+            query = query.filter(Show.start_time < end)
+
+    if city:
+        query = query.filter(located.city == city)
+    if state:
+        query = query.filter(located.state == state)
+
+    return query.order_by(model.id)
+
+def export_value(value):
+    '''
+    Converts a column value to its exported CSV representation, the one
+    the import command reads back.
+    '''
+
+    if isinstance(value, (list, tuple)):
+        return ';'.join(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, timedelta):
+        # In minutes, as entered in the show form.
+        return int(value.total_seconds() // 60)
+    return value
+
+def export_json_value(value):
+    '''
+    Converts a column value JSON has no type for.
+    '''
+
+    if isinstance(value, timedelta):
+        return export_value(value)
+    return str(value)
+
+def export_chunks(query, file_format, batch_size):
+    '''
+    Serializes the rows of a query as CSV or NDJSON.
+
+    The rows are read through a server-side cursor batch_size at a time and
+    serialized batch by batch, so memory use does not grow with the table.
+
+    Parameters:
+        query (obj): A column query.
+        file_format (str): csv or ndjson.
+        batch_size (int): Rows fetched and serialized at a time.
+    Returns:
+        chunks (iter): The serialized text, one chunk per batch.
+    '''
+
+    columns = [column['name'] for column in query.column_descriptions]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if file_format == 'csv':
+        writer.writerow(columns)
+
+    for count, row in enumerate(query.yield_per(batch_size), start=1):
+        if file_format == 'csv':
+            writer.writerow([export_value(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row)), default=export_json_value, separators=(',', ':')))
+            buffer.write('\n')
+
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+def archive_shows(before, batch_size):
+    '''
+    Moves a batch of the shows that started before a datetime to the show
+    archive, in one statement deleting them from the show table.
+
+    Parameters:
+        before (obj): The datetime the shows started before.
+        batch_size (int): The maximum number of shows moved.
+    Returns:
+        moved (int): The number of shows moved, 0 once there are none left.
+    '''
+
+    shows = Show.__table__
+    columns = [shows.c.id, shows.c.start_time, shows.c.duration, shows.c.artist_id, shows.c.venue_id]
+    # The index on start_time finds the old shows, SKIP LOCKED leaves
+    # the rows locked by a concurrent transaction to the next run.
+    batch = db.select(shows.c.id).where(shows.c.start_time < before) \
+        .limit(batch_size).with_for_update(skip_locked=True)
+    moved = shows.delete().where(shows.c.id.in_(batch)).returning(*columns).cte('moved')
+
+    result = db.session.execute(
+        ShowArchive.__table__.insert().from_select([column.name for column in columns], db.select(moved))
+    )
+
+    return result.rowcount
+
+#----------------------------------------------------------------------------#
+# Synthetic data.
+#----------------------------------------------------------------------------#
+
+# Cities in rough order of size. Rows are spread over them with a Zipf-like
+# skew, so a few cities hold most of the venues, as in real listings.
+SEED_CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('Chicago', 'IL'), ('Houston', 'TX'),
+    ('Phoenix', 'AZ'), ('Philadelphia', 'PA'), ('San Antonio', 'TX'), ('San Diego', 'CA'),
+    ('Dallas', 'TX'), ('San Jose', 'CA'), ('Austin', 'TX'), ('Jacksonville', 'FL'),
+    ('San Francisco', 'CA'), ('Columbus', 'OH'), ('Charlotte', 'NC'), ('Indianapolis', 'IN'),
+    ('Seattle', 'WA'), ('Denver', 'CO'), ('Washington', 'DC'), ('Boston', 'MA'),
+    ('Nashville', 'TN'), ('Detroit', 'MI'), ('Portland', 'OR'), ('Las Vegas', 'NV'),
+    ('Memphis', 'TN'), ('Louisville', 'KY'), ('Baltimore', 'MD'), ('Milwaukee', 'WI'),
+    ('Albuquerque', 'NM'), ('New Orleans', 'LA'),
+]
+
+# Genres with their relative popularity.
+SEED_GENRES = [
+    ('Rock n Roll', 20), ('Pop', 18), ('Hip-Hop', 14), ('Jazz', 10), ('Electronic', 9),
+    ('Alternative', 8), ('R&B', 7), ('Country', 6), ('Blues', 5), ('Soul', 5), ('Folk', 4),
+    ('Funk', 3), ('Punk', 3), ('Heavy Metal', 3), ('Reggae', 2), ('Classical', 2),
+    ('Instrumental', 1), ('Musical Theatre', 1), ('Other', 1),
+]
+
+SEED_WORDS = [
+    'Blue', 'Red', 'Golden', 'Silver', 'Velvet', 'Electric', 'Midnight', 'Neon', 'Wild',
+    'Lucky', 'Broken', 'Crystal', 'Iron', 'Rolling', 'Howling', 'Quiet', 'Northern',
+    'Southern', 'Little', 'Grand', 'Owl', 'Fox', 'Moon', 'River', 'Harbor', 'Garden',
+    'Tiger', 'Rose', 'Crow', 'Echo', 'Static', 'Canyon', 'Lantern', 'Anchor', 'Comet',
+]
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+def seed_name(rng, suffixes):
+    return '{} {} {}'.format(rng.choice(SEED_WORDS), rng.choice(SEED_WORDS), rng.choice(suffixes))
+
+def seed_genres(rng):
+    names, weights = zip(*SEED_GENRES)
+    return sorted(set(rng.choices(names, weights=weights, k=rng.randint(1, 3))))
+
+def generate_venues(rng, count):
+    '''
+    Generates venue rows spread over the cities with a Zipf skew.
+    '''
+
+    cities = rng.choices(SEED_CITIES, weights=zipf_weights(len(SEED_CITIES)), k=count)
+    for number, (city, state) in enumerate(cities):
+        yield {
+            "name": seed_name(rng, ['Hall', 'Club', 'Lounge', 'Theatre', 'Bar', 'Room']),
+            "city": city,
+            "state": state,
+            "address": '{} {} St'.format(rng.randint(1, 9999), rng.choice(SEED_WORDS)),
+            "phone": '{:03d}-{:03d}-{:04d}'.format(rng.randint(200, 999), rng.randint(0, 999), number % 10000),
+            "image_link": 'https://picsum.photos/seed/venue{}/300/300'.format(number),
+            "facebook_link": 'https://www.facebook.com/venue{}'.format(number),
+            "genres": seed_genres(rng),
+            "website_link": 'https://venue{}.example.com'.format(number),
+            "seeking_talent": rng.random() < 0.4,
+            "seeking_description": None,
+        }
+
+def generate_artists(rng, count):
+    '''
+    Generates artist rows spread over the cities with a Zipf skew.
+    '''
+
+    cities = rng.choices(SEED_CITIES, weights=zipf_weights(len(SEED_CITIES)), k=count)
+    for number, (city, state) in enumerate(cities):
+        yield {
+            "name": seed_name(rng, ['Band', 'Trio', 'Collective', 'Kids', 'Project', 'Orchestra']),
+            "city": city,
+            "state": state,
+            "phone": '{:03d}-{:03d}-{:04d}'.format(rng.randint(200, 999), rng.randint(0, 999), number % 10000),
+            "genres": seed_genres(rng),
+            "image_link": 'https://picsum.photos/seed/artist{}/300/300'.format(number),
+            "facebook_link": 'https://www.facebook.com/artist{}'.format(number),
+            "website_link": None,
+            "seeking_venue": rng.random() < 0.5,
+            "seeking_description": None,
+        }
+
+def generate_shows(rng, count, venue_ids, artist_ids, now):
+    '''
+    Generates show rows within a year of now.
+
+    Popular venues and artists (the first ids) get most of the shows, and
+    past shows outnumber upcoming ones two to one. Shows last the default
+    duration and never overlap at a venue: a show is moved until its venue
+    is free, and dropped if it is not found free after a few tries.
+    '''
+
+    venue_weights = zipf_weights(len(venue_ids), 0.8)
+    artist_weights = zipf_weights(len(artist_ids), 0.8)
+    venues = rng.choices(venue_ids, weights=venue_weights, k=count)
+    artists = rng.choices(artist_ids, weights=artist_weights, k=count)
+    # Shows start on the hour, the venue is booked for the hours they last.
+    hours = range(-(-DEFAULT_SHOW_DURATION // timedelta(hours=1)))
+    booked = set()
+
+    for venue_id, artist_id in zip(venues, artists):
+        for _ in range(10):
+            days = rng.uniform(-365, 182)
+            start_time = (now + timedelta(days=days)).replace(minute=0, second=0, microsecond=0)
+            slots = [(venue_id, start_time + timedelta(hours=hour)) for hour in hours]
+            if booked.isdisjoint(slots):
+                booked.update(slots)
+                yield {"start_time": start_time, "artist_id": artist_id, "venue_id": venue_id}
+                break
+
+def insert_generated(model, rows, batch_size):
+    '''
+    Inserts generated rows with COPY, committing every batch_size rows.
+    '''
+
+    inserted = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return inserted
+        insert_rows(model, batch, use_copy=True)
+        db.session.commit()
+        inserted += len(batch)
+        click.echo('{}: {} inserted'.format(model.__tablename__, inserted))
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@app.cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORT_MODELS)))
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']),
+              help='Defaults to ndjson for .ndjson/.jsonl files, csv otherwise.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows validated, inserted and committed together.')
+@click.option('--copy', 'use_copy', is_flag=True,
+              help='Load each batch with PostgreSQL COPY instead of batched INSERTs.')
+def import_data(kind, file, file_format, batch_size, use_copy):
+    '''
+    Bulk loads venues, artists or shows from a CSV or NDJSON file.
+
+    Rows are checked with the same rules as the web forms, and shows
+    against the venue bookings. Invalid rows are reported and skipped,
+    valid ones are inserted in batches.
+    '''
+
+    model, form_class = IMPORT_MODELS[kind]
+    if file_format is None:
+        file_format = 'ndjson' if file.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+    rows = read_rows(file, file_format)
+    imported = skipped = 0
+
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        errors, referenced = resolve_show_references(batch) if model is Show else ({}, [])
+        valid_rows = []
+
+        for line_number, row in batch:
+            data, form_errors = (None, {}) if line_number in errors else validate_row(model, form_class, row)
+            if data is None:
+                skipped += 1
+                messages = errors.get(line_number, []) + [
+                    '{}: {}'.format(field, ', '.join(field_errors)) for field, field_errors in form_errors.items()
+                ]
+                click.echo('line {}: {}'.format(line_number, '; '.join(messages)), err=True)
+            else:
+                valid_rows.append((line_number, data))
+
+        # Shows overlapping a booking would fail the whole batch on the
+        # ex_show_venue_booking constraint, they are skipped like invalid rows.
+        conflicts = find_batch_conflicts(valid_rows) if model is Show else {}
+        for line_number, message in sorted(conflicts.items()):
+            skipped += 1
+            click.echo('line {}: {}'.format(line_number, message), err=True)
+        valid_rows = [data for line_number, data in valid_rows if line_number not in conflicts]
+
+        try:
+            insert_rows(model, valid_rows, use_copy)
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            raise click.ClickException('batch ending at line {} failed: {}'.format(batch[-1][0], error))
+
+        imported += len(valid_rows)
+        click.echo('{}: {} imported, {} skipped'.format(kind, imported, skipped))
+
+    if model is Show:
+        repair_counters()
+        db.session.commit()
+
+@app.cli.command('export')
+@click.argument('kind', type=click.Choice(sorted(IMPORT_MODELS)))
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help='Defaults to stdout.')
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']), default='csv',
+              show_default=True)
+@click.option('--city', help='Only rows in this city (the venue city, for shows).')
+@click.option('--state', help='Only rows in this state (the venue state, for shows).')
+@click.option('--from', 'start', type=click.DateTime(), help='Only shows starting at or after this time.')
+@click.option('--to', 'end', type=click.DateTime(), help='Only shows starting before this time.')
+def export_data(kind, output, file_format, city, state, start, end):
+    '''
+    Streams every venue, artist or show as CSV or NDJSON.
+    '''
+
+    query = export_query(kind, city=city, state=state, start=start, end=end)
+
+    for chunk in export_chunks(query, file_format, app.config['STREAM_BATCH_SIZE']):
+        output.write(chunk)
+
+@app.cli.command('seed')
+@click.option('--venues', 'venue_count', default=1000, show_default=True)
+@click.option('--artists', 'artist_count', default=5000, show_default=True)
+@click.option('--shows', 'show_count', default=20000, show_default=True)
+@click.option('--seed', default=42, show_default=True, help='Random seed, the same seed gives the same rows (show times are relative to today).')
+@click.option('--batch-size', default=10000, show_default=True)
+@click.option('--truncate', is_flag=True, help='Delete every venue, artist and show first.')
+def seed_data(venue_count, artist_count, show_count, seed, batch_size, truncate):
+    '''
+    Fills the database with a reproducible synthetic dataset.
+
+    e.g. flask seed --venues 10000 --artists 100000 --shows 1000000
+    '''
+
+    rng = random.Random(seed)
+
+    if truncate:
+        db.session.execute('TRUNCATE "show", show_archive, venue, artist RESTART IDENTITY')
+        db.session.commit()
+
+    # Only the new venues and artists get the generated shows.
+    first_venue_id = (db.session.query(db.func.max(Venue.id)).scalar() or 0) + 1
+    first_artist_id = (db.session.query(db.func.max(Artist.id)).scalar() or 0) + 1
+    insert_generated(Venue, generate_venues(rng, venue_count), batch_size)
+    insert_generated(Artist, generate_artists(rng, artist_count), batch_size)
+
+    if show_count:
+        venue_ids = [venue_id for venue_id, in db.session.query(Venue.id)
+                     .filter(Venue.id >= first_venue_id).order_by(Venue.id)]
+        artist_ids = [artist_id for artist_id, in db.session.query(Artist.id)
+                      .filter(Artist.id >= first_artist_id).order_by(Artist.id)]
+        if not venue_ids or not artist_ids:
+            raise click.ClickException('shows need at least one venue and one artist')
+        now = datetime.now()
+        insert_generated(Show, generate_shows(rng, show_count, venue_ids, artist_ids, now), batch_size)
+        repair_counters(now)
+
+    db.session.execute('ANALYZE venue, artist, "show"')
+    db.session.commit()
+
+@app.cli.command('assets')
+def assets_command():
+    '''
+    Builds the fingerprinted and precompressed CSS and JS bundles.
+
+    Restart the app afterwards so it reads the new manifest.
+    '''
+
+    for name, path in build_assets(app.static_folder).items():
+        click.echo('{} -> {}'.format(name, path))
+
+@app.cli.group('counters')
+def counters_group():
+    '''
+    Maintains the upcoming show counters of venues and artists.
+    '''
+
+@counters_group.command('rollover')
+def rollover_command():
+    '''
+    Drops the shows that have started from the counters.
+
+    Run it periodically, e.g. every few minutes from cron. Only the venues
+    and artists whose next show has started are recomputed.
+    '''
+
+    updated = rollover_counters()
+    db.session.commit()
+    click.echo('venues: {venue} updated, artists: {artist} updated'.format(**updated))
+
+@counters_group.command('repair')
+def repair_command():
+    '''
+    Recomputes every counter from the shows and reports the drift fixed.
+    '''
+
+    updated = repair_counters()
+    db.session.commit()
+    click.echo('venues: {venue} repaired, artists: {artist} repaired'.format(**updated))
+
+@app.cli.group('shows')
+def shows_group():
+    '''
+    Maintains the show tables.
+    '''
+
+@shows_group.command('archive')
+@click.option('--horizon', type=int, default=lambda: app.config['SHOW_ARCHIVE_HORIZON'],
+              help='Archive the shows that started more than this many days ago. [default: SHOW_ARCHIVE_HORIZON]')
+@click.option('--batch-size', default=5000, show_default=True,
+              help='Shows moved and committed together.')
+def archive_command(horizon, batch_size):
+    '''
+    Moves the old shows to the show_archive table.
+
+    Run it periodically, e.g. nightly from cron, to keep the show table
+    small. The venue and artist pages still list the archived shows.
+    '''
+
+    before = datetime.now() - timedelta(days=horizon)
+    archived = 0
+
+    while True:
+        moved = archive_shows(before, batch_size)
+        db.session.commit()
+        if not moved:
+            break
+        archived += moved
+        click.echo('shows: {} archived'.format(archived))
+
+    click.echo('shows: {} archived in total, before {:%Y-%m-%d %H:%M}'.format(archived, before))
@@ -0,0 +1,108 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#----------------------------------------------------------------------------#
+# Response compression.
+#----------------------------------------------------------------------------#
+
+class Compress:
+    '''
+    Compresses the dynamic responses with the best encoding the client
+    accepts: brotli (if the brotli package is installed), then gzip.
+
+    Only the COMPRESS_MIMETYPES are compressed, and only from
+    COMPRESS_MIN_SIZE bytes, except streamed responses which are compressed
+    chunk by chunk as they are sent. Files (static, assets) are left alone.
+    '''
+
+    def __init__(self, app=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', ['text/html', 'application/json']))
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+        self.encodings = (['br'] if brotli is not None else []) + ['gzip']
+
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        '''
+        Compresses a response if it is worth it and the client accepts it.
+
+        Parameters:
+            response (obj): The response of the current request.
+        Returns:
+            response (obj): The same response, compressed or not.
+        '''
+
+        if not self.enabled or response.mimetype not in self.mimetypes \
+                or response.direct_passthrough or 'Content-Encoding' in response.headers \
+                or response.status_code < 200 or response.status_code in (204, 304):
+            return response
+
+        # The representation depends on Accept-Encoding from here on.
+        response.vary.add('Accept-Encoding')
+
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self._compress(data, encoding))
+
+        response.content_encoding = encoding
+
+        # The compressed bytes differ, but a conditional request with the
+        # weak ETag still matches the uncompressed one.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def _compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def _compress_stream(self, chunks, encoding):
+        # Every chunk is flushed so that streamed pages keep arriving early.
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            flush, finish = compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            flush, finish = (lambda: compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.process(chunk) if encoding == 'br' else compressor.compress(chunk)
+            data += flush()
+            if data:
+                yield data
+
+        yield finish()
+
+compress = Compress()
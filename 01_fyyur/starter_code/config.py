@@ -5,14 +5,102 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 # Connect to the database
 
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes', 'y')
+
 class Config:
     database_name = "fyyurapp"
     username = 'postgres'
     password = 'sliman17'
     url = 'localhost:5432'
 
-    SQLALCHEMY_DATABASE_URI = "postgresql://{}:{}@{}/{}".format(
-        username, password, url, database_name)
-    SECRET_KEY = os.urandom(32)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', "postgresql://{}:{}@{}/{}".format(
+        username, password, url, database_name))
     DEBUG = True
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool and per-connection server settings. Timeouts are in
+    # milliseconds for PostgreSQL and in seconds for the pool.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': env_int('DB_POOL_SIZE', 5),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+        'connect_args': {
+            'application_name': os.environ.get('DB_APPLICATION_NAME', 'fyyur'),
+            'options': '-c statement_timeout={} -c idle_in_transaction_session_timeout={}'.format(
+                env_int('DB_STATEMENT_TIMEOUT', 30000),
+                env_int('DB_IDLE_IN_TRANSACTION_TIMEOUT', 60000)),
+        },
+    }
+
+    # Read replicas, a comma separated list of URIs. The read-only views
+    # query one of them, except for REPLICA_STICKINESS seconds after the
+    # user wrote something. They use the pool settings of the primary.
+    SQLALCHEMY_BINDS = {
+        'replica_{}'.format(number): uri
+        for number, uri in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')))
+    }
+    REPLICA_STICKINESS = env_int('DB_REPLICA_STICKINESS', 5)
+
+    # Signs the session cookie, which carries the replica stickiness, so
+    # every worker must use the same key. A random one only does for a
+    # single process without replicas.
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    if not SECRET_KEY:
+        if SQLALCHEMY_BINDS:
+            raise RuntimeError('SECRET_KEY must be set when DATABASE_REPLICA_URLS is')
+        SECRET_KEY = os.urandom(32)
+
+    # Threads running the Flask views that asgi.py does not serve natively.
+    ASGI_WSGI_THREADS = env_int('ASGI_WSGI_THREADS', 10)
+
+    # Maximum number of venues/artists returned by a search.
+    SEARCH_RESULTS_LIMIT = 50
+
+    # In-process name indexes answering the autocomplete of the show form.
+    # Each process reloads them every AUTOCOMPLETE_REFRESH_INTERVAL seconds
+    # to pick up the changes made by the others.
+    AUTOCOMPLETE_ENABLED = True
+    AUTOCOMPLETE_LIMIT = 10
+    AUTOCOMPLETE_REFRESH_INTERVAL = 300
+
+    # Default and maximum number of rows on a listing page.
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    # Rows fetched per round trip, and template chunks per write, when streaming.
+    STREAM_BATCH_SIZE = 100
+
+    # Most recent past shows on a venue or artist page, read from the show
+    # table and from the show archive.
+    PAST_SHOWS_LIMIT = 50
+
+    # "flask shows archive" moves the shows that started more than this
+    # many days ago to the show_archive table.
+    SHOW_ARCHIVE_HORIZON = 90
+
+    # Rendered page cache of the read views.
+    CACHE_ENABLED = True
+    CACHE_TTL = 60
+    CACHE_MAX_ENTRIES = 1024
+
+    # Requests over the query budget or latency threshold (seconds) are
+    # logged with the EXPLAIN plan of their slowest statements.
+    QUERY_MONITORING_ENABLED = True
+    QUERY_BUDGET = 20
+    SLOW_REQUEST_THRESHOLD = 0.5
+    SLOW_QUERY_EXPLAIN_COUNT = 3
+
+    # Compression of the dynamic responses (brotli if installed, else
+    # gzip). Smaller bodies are not worth the CPU, streamed ones are always
+    # compressed.
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_MIMETYPES = ['text/html', 'application/json', 'application/x-ndjson', 'text/csv']
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
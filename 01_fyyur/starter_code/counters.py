@@ -0,0 +1,104 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Upcoming show counters.
+#----------------------------------------------------------------------------#
+
+# Venue.upcoming_shows_count and Venue.next_show_time (and the same columns
+# of Artist) are maintained here so the listings read them instead of
+# counting shows. New shows are counted when they are created, shows
+# moving into the past are rolled over by "flask counters rollover".
+
+COUNTED_MODELS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+def count_new_show(show, now=None):
+    '''
+    Adds a new upcoming show to its venue's and artist's counters.
+
+    Run it in the transaction inserting the show. The counters are
+    incremented in place, so concurrent shows are all counted.
+
+    Parameters:
+        show (obj): The new Show.
+        now (obj): The current datetime.
+    '''
+
+    now = now or datetime.now()
+    if show.start_time is None or show.start_time <= now:
+        return
+
+    for model, model_id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+        db.session.query(model).filter(model.id == model_id).update({
+            model.upcoming_shows_count: model.upcoming_shows_count + 1,
+            # LEAST ignores NULL, the first upcoming show sets the time.
+            model.next_show_time: db.func.least(model.next_show_time, show.start_time),
+        }, synchronize_session=False)
+
+def refresh_counters(model, column, ids=None, stale_only=False, now=None):
+    '''
+    Recomputes the upcoming show counters of venues or artists.
+
+    Only the rows whose stored counters differ from the shows are
+    written.
+
+    Parameters:
+        model (obj): Venue or Artist.
+        column (obj): Show.venue_id or Show.artist_id.
+        ids (list): Only these venues or artists, all of them by default.
+        stale_only (bool): Only the rows whose next show has started,
+            the only ones the passing of time can make wrong.
+        now (obj): The current datetime.
+    Returns:
+        updated (int): The number of rows that were wrong.
+    '''
+
+    now = now or datetime.now()
+
+    upcoming = db.and_(column == model.id, Show.start_time > now)
+    count = db.session.query(db.func.count(Show.id)).filter(upcoming).scalar_subquery()
+    next_show_time = db.session.query(db.func.min(Show.start_time)).filter(upcoming).scalar_subquery()
+
+    query = db.session.query(model)
+    if ids is not None:
+        query = query.filter(model.id.in_(ids))
+    if stale_only:
+        query = query.filter(model.next_show_time <= now)
+
+    return query.filter(db.or_(
+        model.upcoming_shows_count != count,
+        model.next_show_time.is_distinct_from(next_show_time)
+    )).update({
+        model.upcoming_shows_count: count,
+        model.next_show_time: next_show_time,
+    }, synchronize_session=False)
+
+def rollover_counters(now=None):
+    '''
+    Moves the shows that have started out of the upcoming counters.
+
+    Returns:
+        updated (dict): The number of venues and artists updated.
+    '''
+
+    return {
+        model.__tablename__: refresh_counters(model, column, stale_only=True, now=now)
+        for model, column in COUNTED_MODELS
+    }
+
+def repair_counters(now=None):
+    '''
+    Recomputes every counter, fixing any drift.
+
+    Returns:
+        updated (dict): The number of venues and artists that had drifted.
+    '''
+
+    return {
+        model.__tablename__: refresh_counters(model, column, now=now)
+        for model, column in COUNTED_MODELS
+    }
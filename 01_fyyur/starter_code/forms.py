@@ -1,14 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_wtf import Form
 from wtforms import (
     StringField,
     SelectField,
     SelectMultipleField,
     DateTimeField,
-    BooleanField
+    BooleanField,
+    IntegerField
 )
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms.validators import DataRequired, AnyOf, URL, ValidationError
 import re
+from models import db, Venue, Artist, DEFAULT_SHOW_DURATION
 
 # Helper functions
 def validate_phone(self, phone):
@@ -18,18 +20,56 @@ def validate_phone(self, phone):
     if not match:
         raise ValidationError('Error, phone number must be in format xxx-xxx-xxxx')
 
+def validate_exists(model, field):
+    record_id = str(field.data or '').strip()
+
+    if not record_id.isdigit() or db.session.get(model, int(record_id)) is None:
+        raise ValidationError('Error, there is no {} with id {}'.format(model.__tablename__, record_id))
+
+class DurationField(IntegerField):
+    '''
+    A duration entered in minutes, held as a timedelta. Left blank, it is
+    the default.
+    '''
+
+    def process_data(self, value):
+        self.data = value
+
+    def process_formdata(self, valuelist):
+        if valuelist and str(valuelist[0]).strip():
+            super().process_formdata(valuelist)
+            if not 0 < self.data <= 24 * 60:
+                self.data = None
+                raise ValueError('Error, a show lasts between 1 minute and 24 hours')
+            self.data = timedelta(minutes=self.data)
+
+    def _value(self):
+        if self.raw_data:
+            return self.raw_data[0]
+        return str(int(self.data.total_seconds() // 60)) if self.data is not None else ''
+
 class ShowForm(Form):
     artist_id = StringField(
-        'artist_id'
+        'artist_id', validators=[DataRequired()]
     )
     venue_id = StringField(
-        'venue_id'
+        'venue_id', validators=[DataRequired()]
     )
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
         default= datetime.today()
     )
+    duration = DurationField(
+        'duration',
+        default=DEFAULT_SHOW_DURATION
+    )
+
+    def validate_artist_id(self, field):
+        validate_exists(Artist, field)
+
+    def validate_venue_id(self, field):
+        validate_exists(Venue, field)
 
 class VenueForm(Form):
     name = StringField(
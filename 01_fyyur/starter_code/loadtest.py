@@ -0,0 +1,378 @@
+'''
+Concurrent HTTP load and soak test of the app.
+
+Serves the app with a pre-forked multi-worker WSGI server on localhost
+and replays a weighted mix of listing, detail, search and show creation
+requests at one or more concurrency levels, e.g.
+
+    python loadtest.py --workers 4 --concurrency 8,32,64 --duration 30
+    python loadtest.py --concurrency 32 --duration 3600 --interval 60
+
+Every interval it prints the throughput, p50/p95/p99 latency, error rate
+(responses other than 2xx/3xx), the share of 4xx responses among them,
+the database connections of the workers (from pg_stat_activity) and
+their connection pools (from /status/pool) so pool saturation can be
+followed over time. Everything runs locally
+against DATABASE_URL. Show creation writes to the database, leave it out
+of the mix (--mix) to keep the dataset unchanged.
+'''
+
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import http.client
+import json
+import multiprocessing
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+import click
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+from werkzeug.serving import make_server, WSGIRequestHandler
+from app import app
+from benchmark import percentile
+from cache import cache
+from monitoring import query_monitor
+
+#----------------------------------------------------------------------------#
+# Traffic.
+#----------------------------------------------------------------------------#
+
+DEFAULT_MIX = 'venues=10,artists=10,shows=10,show_venue=25,show_artist=25,search_venues=8,search_artists=8,create_show=4'
+
+REQUESTS = ('venues', 'artists', 'shows', 'show_venue', 'show_artist',
+            'search_venues', 'search_artists', 'create_show')
+
+SEARCH_TERMS = ['the', 'blue', 'club', 'hall', 'band', 'moon', 'red', 'jazz', 'a', 'o']
+
+def parse_mix(mix):
+    '''
+    Parses a traffic mix such as 'venues=10,show_venue=25'.
+
+    Returns:
+        names (list): The request kinds.
+        weights (list): Their relative weights.
+    '''
+
+    pairs = [item.split('=') for item in mix.split(',') if item]
+    unknown = [name for name, _ in pairs if name not in REQUESTS]
+    if unknown:
+        raise click.BadParameter('unknown request kinds: {}'.format(', '.join(unknown)))
+
+    return [name for name, _ in pairs], [float(weight) for _, weight in pairs]
+
+def make_request(kind, rng, ids):
+    '''
+    Builds a request of the given kind.
+
+    Returns:
+        method (str), path (str), body (str or None)
+    '''
+
+    if kind in ('venues', 'artists', 'shows'):
+        return 'GET', '/' + kind, None
+    if kind == 'show_venue':
+        return 'GET', '/venues/{}'.format(rng.choice(ids['venues'])), None
+    if kind == 'show_artist':
+        return 'GET', '/artists/{}'.format(rng.choice(ids['artists'])), None
+    if kind in ('search_venues', 'search_artists'):
+        path = '/{}/search'.format(kind.split('_')[1])
+        return 'POST', path, urlencode({'search_term': rng.choice(SEARCH_TERMS)})
+
+    start_time = datetime.now() + timedelta(days=rng.randint(1, 180), hours=rng.randint(0, 23))
+    return 'POST', '/shows/create', urlencode({
+        'venue_id': rng.choice(ids['venues']),
+        'artist_id': rng.choice(ids['artists']),
+        'start_time': start_time.strftime('%Y-%m-%d %H:00:00'),
+    })
+
+#----------------------------------------------------------------------------#
+# Server.
+#----------------------------------------------------------------------------#
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+def serve(fd, host, port):
+    # Runs in a forked worker sharing the listening socket. The database
+    # engine is created lazily, so each worker opens its own pool.
+    server = make_server(host, port, app, threaded=True, request_handler=QuietRequestHandler, fd=fd)
+    server.serve_forever()
+
+def start_workers(count, host, port):
+    '''
+    Starts the pre-forked server workers on a shared listening socket.
+
+    Returns:
+        workers (list): The worker processes.
+        port (int): The port listened on.
+    '''
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+    listener.set_inheritable(True)
+
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=serve, args=(listener.fileno(), host, listener.getsockname()[1]), daemon=True)
+        for _ in range(count)
+    ]
+    for worker in workers:
+        worker.start()
+
+    return workers, listener.getsockname()[1]
+
+#----------------------------------------------------------------------------#
+# Load driver.
+#----------------------------------------------------------------------------#
+
+class Recorder:
+    '''
+    Collects (time, kind, latency, status) samples from the client threads,
+    the status being None when the request failed without a response.
+    '''
+
+    def __init__(self):
+        self.samples = []
+        self.lock = threading.Lock()
+
+    def add(self, kind, latency, status):
+        with self.lock:
+            self.samples.append((time.monotonic(), kind, latency, status))
+
+    def since(self, start):
+        with self.lock:
+            return [sample for sample in self.samples if sample[0] >= start]
+
+def summarize(samples, seconds):
+    '''
+    Returns the throughput, error rates and latency percentiles of samples.
+
+    Every response but a 2xx or 3xx is an error. The 4xx are also counted
+    apart, since some are expected (e.g. 409 for a show booked at a busy
+    venue) while others point at the driver or a route.
+    '''
+
+    latencies = [latency * 1000 for _, _, latency, _ in samples] or [0.0]
+    errors = sum(1 for _, _, _, status in samples if status is None or not 200 <= status < 400)
+    client_errors = sum(1 for _, _, _, status in samples if status is not None and 400 <= status < 500)
+    return {
+        "requests": len(samples),
+        "throughput": round(len(samples) / seconds, 1) if seconds else 0.0,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "client_error_rate": round(client_errors / len(samples), 4) if samples else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+def client_loop(host, port, names, weights, ids, recorder, stop, seed):
+    rng = random.Random(seed)
+    headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+    while not stop.is_set():
+        kind = rng.choices(names, weights=weights)[0]
+        method, path, body = make_request(kind, rng, ids)
+        start = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=60)
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            connection.close()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = None
+        recorder.add(kind, time.perf_counter() - start, status)
+
+def database_connections(monitor_engine, application_name):
+    '''
+    Counts the workers' database connections by state.
+    '''
+
+    with monitor_engine.connect() as connection:
+        rows = connection.execute(text(
+            'SELECT state, count(*) FROM pg_stat_activity '
+            'WHERE application_name = :name GROUP BY state'), {'name': application_name})
+        return {state or 'unknown': count for state, count in rows}
+
+def pool_statuses(host, port, workers):
+    '''
+    Reads /status/pool from the workers.
+
+    Which worker answers is up to the kernel, so it is requested a few
+    times per worker until each one has.
+
+    Returns:
+        statuses (dict): The pool status of the workers by process id.
+    '''
+
+    statuses = {}
+    for _ in range(workers * 4):
+        if len(statuses) == workers:
+            break
+        try:
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            connection.request('GET', '/status/pool')
+            response = connection.getresponse()
+            status = json.loads(response.read())
+            connection.close()
+        except (OSError, http.client.HTTPException, ValueError):
+            continue
+        statuses[status["process"]] = status
+
+    return statuses
+
+def summarize_pools(statuses, previous):
+    '''
+    Adds up the pools of the workers.
+
+    Parameters:
+        statuses (dict): The current pool statuses by process id.
+        previous (dict): The statuses read at the previous interval.
+    Returns:
+        summary (dict): The connections checked out and in overflow, and
+            the checkouts and their wait times since the previous interval.
+    '''
+
+    checkouts = wait_time = 0
+    for process, status in statuses.items():
+        before = previous.get(process, {})
+        checkouts += status.get("checkouts", 0) - before.get("checkouts", 0)
+        wait_time += status.get("total_wait_time", 0.0) - before.get("total_wait_time", 0.0)
+
+    return {
+        "workers": len(statuses),
+        "checked_out": sum(status["checked_out"] for status in statuses.values()),
+        "overflow": sum(max(status["overflow"], 0) for status in statuses.values()),
+        "checkouts": checkouts,
+        "average_wait_ms": round(wait_time / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(max((status.get("max_wait_time", 0.0) for status in statuses.values()), default=0.0) * 1000, 3),
+    }
+
+def run_stage(concurrency, duration, interval, host, port, names, weights, ids, monitor, workers, seed):
+    '''
+    Runs one concurrency level and reports every interval.
+
+    Returns:
+        summary (dict): The stage results and its interval samples.
+    '''
+
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=client_loop,
+                         args=(host, port, names, weights, ids, recorder, stop, seed + number),
+                         daemon=True)
+        for number in range(concurrency)
+    ]
+
+    stage_start = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    intervals = []
+    pools = pool_statuses(host, port, workers)
+    while time.monotonic() - stage_start < duration:
+        interval_start = time.monotonic()
+        time.sleep(min(interval, duration - (interval_start - stage_start)))
+        samples = recorder.since(interval_start)
+        report = summarize(samples, time.monotonic() - interval_start)
+        report["elapsed"] = round(time.monotonic() - stage_start, 1)
+        report["db_connections"] = monitor()
+        statuses = pool_statuses(host, port, workers)
+        report["pool"] = summarize_pools(statuses, pools)
+        pools = {**pools, **statuses}
+        intervals.append(report)
+        click.echo('  {elapsed:>7.1f}s {throughput:>8.1f} req/s  p50 {p50_ms:>8.2f}ms  p95 {p95_ms:>8.2f}ms  '
+                   'p99 {p99_ms:>8.2f}ms  errors {error_rate:>6.2%} (4xx {client_error_rate:.2%})  '
+                   'db {db_connections}  pool {pool}'.format(**report))
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    samples = recorder.since(stage_start)
+    summary = summarize(samples, time.monotonic() - stage_start)
+    summary["concurrency"] = concurrency
+    summary["by_kind"] = {
+        kind: summarize([sample for sample in samples if sample[1] == kind], time.monotonic() - stage_start)
+        for kind in names
+    }
+    summary["intervals"] = intervals
+
+    return summary
+
+#----------------------------------------------------------------------------#
+# Launch.
+#----------------------------------------------------------------------------#
+
+@click.command()
+@click.option('--workers', default=multiprocessing.cpu_count(), show_default=True, help='Server processes.')
+@click.option('--concurrency', default='8,32', show_default=True, help='Comma separated client counts, one stage each.')
+@click.option('--duration', default=30, show_default=True, help='Seconds per stage.')
+@click.option('--interval', default=5, show_default=True, help='Seconds between reports.')
+@click.option('--mix', default=DEFAULT_MIX, show_default=True, help='Request kinds and their weights.')
+@click.option('--port', default=0, help='Defaults to a free port.')
+@click.option('--seed', default=42, show_default=True)
+@click.option('--cache/--no-cache', 'use_cache', default=True, show_default=True,
+              help='Serve the read views from the page cache.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Write the results as JSON.')
+def main(workers, concurrency, duration, interval, mix, port, seed, use_cache, output):
+    '''
+    Drives concurrent mixed traffic against a multi-worker server.
+    '''
+
+    names, weights = parse_mix(mix)
+    host = '127.0.0.1'
+    cache.enabled = use_cache
+    query_monitor.enabled = False
+
+    # The driver gets its own connections, tagged so they are not counted
+    # as the workers'.
+    monitor_engine = create_engine(
+        app.config['SQLALCHEMY_DATABASE_URI'], poolclass=NullPool,
+        connect_args={'application_name': 'fyyur-loadtest'})
+    application_name = app.config['SQLALCHEMY_ENGINE_OPTIONS']['connect_args']['application_name']
+
+    with monitor_engine.connect() as connection:
+        ids = {
+            "venues": [row[0] for row in connection.execute(text('SELECT id FROM venue ORDER BY random() LIMIT 1000'))],
+            "artists": [row[0] for row in connection.execute(text('SELECT id FROM artist ORDER BY random() LIMIT 1000'))],
+        }
+    if not ids["venues"] or not ids["artists"]:
+        raise click.ClickException('the database needs venues and artists, see "flask seed"')
+
+    processes, port = start_workers(workers, host, port)
+    click.echo('{} workers listening on {}:{}'.format(workers, host, port))
+    time.sleep(1)
+
+    results = {"workers": workers, "mix": dict(zip(names, weights)), "stages": []}
+    try:
+        for level in [int(level) for level in concurrency.split(',')]:
+            click.echo('concurrency {}'.format(level))
+            stage = run_stage(level, duration, interval, host, port, names, weights, ids,
+                              lambda: database_connections(monitor_engine, application_name), workers, seed)
+            results["stages"].append(stage)
+            click.echo('  total {throughput} req/s  p50 {p50_ms}ms  p95 {p95_ms}ms  p99 {p99_ms}ms  '
+                       'errors {error_rate:.2%} (4xx {client_error_rate:.2%})'.format(**stage))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+    if output:
+        with open(output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""add trigram name search indexes
+
+Revision ID: 3b9d2c7e41a0
+Revises: 55a5b58b1b59
+Create Date: 2026-10-18 09:12:44.218305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2c7e41a0'
+down_revision = '55a5b58b1b59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GIN trigram indexes let the name ILIKE '%term%' searches use an index
+    # instead of a sequential scan.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venue_name_trgm', 'venue', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artist_name_trgm', 'artist', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_trgm', table_name='artist')
+    op.drop_index('ix_venue_name_trgm', table_name='venue')
@@ -0,0 +1,30 @@
+"""replace show start time brin index with a btree
+
+Revision ID: 5d8b2f6c0e47
+Revises: a7c3e5d91f28
+Create Date: 2026-10-18 19:24:48.731952
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8b2f6c0e47'
+down_revision = 'a7c3e5d91f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Shows are listed in any order, so their start times are not
+    # correlated with the table pages as the BRIN index needs. A btree
+    # serves the date range queries (/shows?from=&to=, counter rollover,
+    # archiving) and, with the id, the keyset order of the show listing.
+    op.drop_index('ix_show_start_time_brin', table_name='show')
+    op.create_index('ix_show_start_time_id', 'show', ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
+    op.create_index('ix_show_start_time_brin', 'show', ['start_time'], unique=False, postgresql_using='brin')
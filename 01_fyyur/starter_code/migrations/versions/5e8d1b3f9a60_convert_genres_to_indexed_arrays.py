@@ -0,0 +1,41 @@
+"""convert genres to indexed arrays
+
+Revision ID: 5e8d1b3f9a60
+Revises: a7f35be08c12
+Create Date: 2026-10-18 11:02:37.519842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8d1b3f9a60'
+down_revision = 'a7f35be08c12'
+branch_labels = None
+depends_on = None
+
+# The genres were stored as '{Jazz,Blues}' array literals in varchar
+# columns, anything else is read as a comma separated list.
+TO_ARRAY = "CASE WHEN left(genres, 1) = '{' THEN genres::varchar[] " \
+           "ELSE string_to_array(genres, ',')::varchar[] END"
+
+
+def upgrade():
+    op.alter_column('venue', 'genres', type_=postgresql.ARRAY(sa.String()),
+                    existing_type=sa.VARCHAR(length=120), postgresql_using=TO_ARRAY)
+    op.alter_column('artist', 'genres', type_=postgresql.ARRAY(sa.String()),
+                    existing_type=sa.VARCHAR(length=100), postgresql_using=TO_ARRAY)
+    # GIN indexes serve the genre filters (&& and @>).
+    op.create_index('ix_venue_genres', 'venue', ['genres'], unique=False, postgresql_using='gin')
+    op.create_index('ix_artist_genres', 'artist', ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_artist_genres', table_name='artist')
+    op.drop_index('ix_venue_genres', table_name='venue')
+    op.alter_column('artist', 'genres', type_=sa.VARCHAR(length=100),
+                    existing_type=postgresql.ARRAY(sa.String()), postgresql_using='genres::varchar(100)')
+    op.alter_column('venue', 'genres', type_=sa.VARCHAR(length=120),
+                    existing_type=postgresql.ARRAY(sa.String()), postgresql_using='genres::varchar(120)')
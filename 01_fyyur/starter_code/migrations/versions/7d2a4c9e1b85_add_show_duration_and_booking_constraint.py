@@ -0,0 +1,63 @@
+"""add show duration and venue booking constraint
+
+Revision ID: 7d2a4c9e1b85
+Revises: c41f0e7b92d3
+Create Date: 2026-10-18 14:06:21.538207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2a4c9e1b85'
+down_revision = 'c41f0e7b92d3'
+branch_labels = None
+depends_on = None
+
+# Shows without a start time, which the constraint would see as booking
+# their venue forever: tsrange(NULL, NULL) is unbounded.
+UNSCHEDULED = 'SELECT id FROM "show" WHERE start_time IS NULL ORDER BY id'
+
+# Pairs of shows booked at the same venue at overlapping times.
+OVERLAPS = (
+    'SELECT a.id, b.id, a.venue_id FROM "show" a JOIN "show" b ON b.venue_id = a.venue_id AND b.id > a.id '
+    'AND b.start_time < a.start_time + a.duration AND a.start_time < b.start_time + b.duration '
+    'ORDER BY a.id, b.id'
+)
+
+
+def upgrade():
+    op.add_column('show', sa.Column('duration', sa.Interval(), server_default='2 hours', nullable=False))
+
+    unscheduled = op.get_bind().execute(sa.text(UNSCHEDULED)).fetchall()
+    if unscheduled:
+        raise RuntimeError(
+            '{} shows have no start time, e.g. shows {}. Set their start time or delete them, '
+            'then run the migration again.'.format(
+                len(unscheduled), ', '.join(str(show_id) for show_id, in unscheduled[:5]))
+        )
+    op.alter_column('show', 'start_time', existing_type=sa.DateTime(), nullable=False)
+
+    # The constraint cannot be added over existing double bookings, and
+    # which show to move or delete is not for a migration to decide.
+    overlaps = op.get_bind().execute(sa.text(OVERLAPS)).fetchall()
+    if overlaps:
+        raise RuntimeError(
+            '{} pairs of shows overlap at the same venue, e.g. {}. Move or delete them, '
+            'then run the migration again.'.format(
+                len(overlaps),
+                ', '.join('shows {} and {} at venue {}'.format(*overlap) for overlap in overlaps[:5]))
+        )
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        'ALTER TABLE "show" ADD CONSTRAINT ex_show_venue_booking '
+        'EXCLUDE USING gist (venue_id WITH =, tsrange(start_time, start_time + duration) WITH &&)'
+    )
+
+
+def downgrade():
+    op.drop_constraint('ex_show_venue_booking', 'show')
+    op.alter_column('show', 'start_time', existing_type=sa.DateTime(), nullable=True)
+    op.drop_column('show', 'duration')
@@ -0,0 +1,25 @@
+"""add venue area listing index
+
+Revision ID: 9c4e1f6a2d57
+Revises: 3b9d2c7e41a0
+Create Date: 2026-10-18 10:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e1f6a2d57'
+down_revision = '3b9d2c7e41a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs the (state, city, id) keyset pagination of the /venues listing.
+    op.create_index('ix_venue_state_city_id', 'venue', ['state', 'city', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_venue_state_city_id', table_name='venue')
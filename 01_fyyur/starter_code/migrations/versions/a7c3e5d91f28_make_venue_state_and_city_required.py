@@ -0,0 +1,31 @@
+"""make venue state and city required
+
+Revision ID: a7c3e5d91f28
+Revises: f4a1c8e6d390
+Create Date: 2026-10-18 18:52:13.604117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e5d91f28'
+down_revision = 'f4a1c8e6d390'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The venue listing pages on (state, city, id), and a keyset comparison
+    # with a NULL is never true, which dropped such venues from the next
+    # pages. The forms always required both, only older rows can lack them.
+    op.execute("UPDATE venue SET state = '' WHERE state IS NULL")
+    op.execute("UPDATE venue SET city = '' WHERE city IS NULL")
+    op.alter_column('venue', 'state', existing_type=sa.String(length=120), nullable=False)
+    op.alter_column('venue', 'city', existing_type=sa.String(length=120), nullable=False)
+
+
+def downgrade():
+    op.alter_column('venue', 'city', existing_type=sa.String(length=120), nullable=True)
+    op.alter_column('venue', 'state', existing_type=sa.String(length=120), nullable=True)
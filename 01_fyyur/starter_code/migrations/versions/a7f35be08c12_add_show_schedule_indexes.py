@@ -0,0 +1,27 @@
+"""add show schedule indexes
+
+Revision ID: a7f35be08c12
+Revises: 9c4e1f6a2d57
+Create Date: 2026-10-18 10:41:09.732615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f35be08c12'
+down_revision = '9c4e1f6a2d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Venue and artist schedules are read by foreign key ordered by start_time.
+    op.create_index('ix_show_venue_id_start_time', 'show', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_artist_id_start_time', 'show', ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_show_artist_id_start_time', table_name='show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='show')
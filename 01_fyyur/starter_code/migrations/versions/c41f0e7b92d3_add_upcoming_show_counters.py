@@ -0,0 +1,34 @@
+"""add upcoming show counters
+
+Revision ID: c41f0e7b92d3
+Revises: 5e8d1b3f9a60
+Create Date: 2026-10-18 11:38:52.104377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f0e7b92d3'
+down_revision = '5e8d1b3f9a60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, column in (('venue', 'venue_id'), ('artist', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('next_show_time', sa.DateTime(), nullable=True))
+        op.execute(
+            'UPDATE {table} SET upcoming_shows_count = upcoming.count, next_show_time = upcoming.next_show_time '
+            'FROM (SELECT {column} AS id, count(*) AS count, min(start_time) AS next_show_time '
+            'FROM "show" WHERE start_time > localtimestamp GROUP BY {column}) AS upcoming '
+            'WHERE {table}.id = upcoming.id'.format(table=table, column=column)
+        )
+
+
+def downgrade():
+    for table in ('artist', 'venue'):
+        op.drop_column(table, 'next_show_time')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,26 @@
+"""add seeking talent venue index
+
+Revision ID: e6b0f4d27a19
+Revises: 7d2a4c9e1b85
+Create Date: 2026-10-18 15:12:44.907316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b0f4d27a19'
+down_revision = '7d2a4c9e1b85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs the /venues/available listing, in the order of the /venues one.
+    op.create_index('ix_venue_seeking_talent_state_city_id', 'venue', ['state', 'city', 'id'], unique=False,
+                    postgresql_where=sa.text('seeking_talent'))
+
+
+def downgrade():
+    op.drop_index('ix_venue_seeking_talent_state_city_id', table_name='venue')
@@ -0,0 +1,42 @@
+"""add show archive table
+
+Revision ID: f4a1c8e6d390
+Revises: b3e97a0c5d42
+Create Date: 2026-10-18 17:41:36.270184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a1c8e6d390'
+down_revision = 'b3e97a0c5d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('show_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('duration', sa.Interval(), nullable=False),
+    sa.Column('artist_id', sa.Integer(), nullable=True),
+    sa.Column('venue_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['artist_id'], ['artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['venue_id'], ['venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_show_archive_venue_id_start_time', 'show_archive', ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_show_archive_artist_id_start_time', 'show_archive', ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    # Archived shows go back to the show table first.
+    op.execute(
+        'INSERT INTO "show" (id, start_time, duration, artist_id, venue_id) '
+        'SELECT id, start_time, duration, artist_id, venue_id FROM show_archive'
+    )
+    op.drop_index('ix_show_archive_artist_id_start_time', table_name='show_archive')
+    op.drop_index('ix_show_archive_venue_id_start_time', table_name='show_archive')
+    op.drop_table('show_archive')
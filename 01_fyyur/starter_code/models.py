@@ -4,21 +4,33 @@
 
 from flask import Flask
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from assets import assets
+from cache import cache
+from compression import compress
+from monitoring import TimedQueuePool, query_monitor
+from replicas import RoutingSQLAlchemy, replica_router
 
 app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config.Config')
-db = SQLAlchemy(app)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'].setdefault('poolclass', TimedQueuePool)
+db = RoutingSQLAlchemy(app)
 
 migrate = Migrate(app, db)
+cache.init_app(app)
+query_monitor.init_app(app)
+replica_router.init_app(app, db)
+assets.init_app(app)
+compress.init_app(app)
 
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
 
-from sqlalchemy import ARRAY
+from datetime import timedelta
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint
+from sqlalchemy.ext.hybrid import hybrid_property
 
 
 class Venue(db.Model):
@@ -27,11 +39,20 @@ class Venue(db.Model):
     '''
 
     __tablename__ = 'venue'
+    __table_args__ = (
+        db.Index('ix_venue_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_venue_state_city_id', 'state', 'city', 'id'),
+        db.Index('ix_venue_seeking_talent_state_city_id', 'state', 'city', 'id',
+                 postgresql_where=db.text('seeking_talent')),
+        db.Index('ix_venue_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120))
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
+    # Part of the listing's keyset, so never NULL.
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
@@ -40,6 +61,9 @@ class Venue(db.Model):
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(200))
+    # Maintained by counters.py.
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime)
     shows = db.relationship('Show', backref='venue', cascade='all, delete, delete-orphan', lazy=True)
 
     def __repr__(self):
@@ -51,34 +75,88 @@ class Artist(db.Model):
     '''
 
     __tablename__ = 'artist'
+    __table_args__ = (
+        db.Index('ix_artist_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_artist_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(ARRAY(db.String(10)))
+    genres = db.Column(ARRAY(db.String()))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean)
     seeking_description = db.Column(db.String(200))
+    # Maintained by counters.py.
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_time = db.Column(db.DateTime)
     shows = db.relationship('Show', backref='artist', cascade='all, delete, delete-orphan', lazy=True)
 
     def __repr__(self):
         return self.name
 
+# Duration of the shows listed without one.
+DEFAULT_SHOW_DURATION = timedelta(hours=2)
+
 class Show(db.Model):
     '''
     Represents a show.
+
+    The shows of a venue cannot overlap: the exclusion constraint rejects a
+    show whose [start_time, end_time) range overlaps another at the same
+    venue (needs the btree_gist extension for venue_id).
     '''
 
     __tablename__ = 'show'
+    __table_args__ = (
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+        ExcludeConstraint(
+            ('venue_id', '='),
+            (db.text('tsrange(start_time, start_time + duration)'), '&&'),
+            name='ex_show_venue_booking', using='gist'
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime)
+    # tsrange(NULL, NULL) is unbounded: a show without a start time would
+    # book its venue forever.
+    start_time = db.Column(db.DateTime, nullable=False)
+    duration = db.Column(db.Interval, nullable=False, default=DEFAULT_SHOW_DURATION, server_default='2 hours')
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id'))
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id'))
 
+    @hybrid_property
+    def end_time(self):
+        return self.start_time + self.duration
+
     def __repr__(self):
         return f"Artist's {self.artist_id} show"
+
+class ShowArchive(db.Model):
+    '''
+    Represents a past show moved out of the show table by
+    "flask shows archive", with its original id.
+    '''
+
+    __tablename__ = 'show_archive'
+    __table_args__ = (
+        db.Index('ix_show_archive_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_archive_artist_id_start_time', 'artist_id', 'start_time'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    start_time = db.Column(db.DateTime)
+    duration = db.Column(db.Interval, nullable=False)
+    # Deleting a venue deletes its shows, the archived ones included.
+    artist_id = db.Column(db.Integer, db.ForeignKey('artist.id', ondelete='CASCADE'))
+    venue_id = db.Column(db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'))
+
+    def __repr__(self):
+        return f"Artist's {self.artist_id} archived show"
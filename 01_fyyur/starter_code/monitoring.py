@@ -0,0 +1,213 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from flask import g, request, has_request_context
+from jinja2 import Template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+class TimedQueuePool(QueuePool):
+    '''
+    QueuePool that records how long checkouts wait for a connection.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self._stats_lock = threading.Lock()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_time += waited
+                self.max_wait_time = max(self.max_wait_time, waited)
+
+def pool_status(engine):
+    '''
+    Reports the live state of an engine's connection pool.
+
+    Parameters:
+        engine (obj): The SQLAlchemy engine.
+    Returns:
+        status (dict): Pool size, connections checked in and out, overflow
+            and, for a TimedQueuePool, checkout wait times in seconds.
+    '''
+
+    pool = engine.pool
+    status = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+    }
+
+    if isinstance(pool, TimedQueuePool):
+        status.update({
+            "checkouts": pool.checkouts,
+            "total_wait_time": round(pool.wait_time, 6),
+            "average_wait_time": round(pool.wait_time / pool.checkouts, 6) if pool.checkouts else 0.0,
+            "max_wait_time": round(pool.max_wait_time, 6),
+        })
+
+    return status
+
+#----------------------------------------------------------------------------#
+# Request profiling.
+#----------------------------------------------------------------------------#
+
+class TimedTemplate(Template):
+    '''
+    Template adding its rendering time to the current request's profile.
+    '''
+
+    def render(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            add_render_time(time.perf_counter() - start)
+
+    def generate(self, *args, **kwargs):
+        # Streamed rendering: only the time spent producing chunks counts.
+        chunks = super().generate(*args, **kwargs)
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                add_render_time(time.perf_counter() - start)
+            yield chunk
+
+def add_render_time(seconds):
+    if has_request_context() and 'profile' in g:
+        g.profile['render_time'] += seconds
+
+class QueryMonitor:
+    '''
+    Profiles every request: query count, database time and render time.
+
+    Requests issuing more than QUERY_BUDGET statements or taking longer
+    than SLOW_REQUEST_THRESHOLD seconds are logged as warnings with their
+    slowest SELECT statements and the EXPLAIN plan of each, which is how
+    N+1 query patterns show up. The other requests are logged at debug
+    level.
+    '''
+
+    def __init__(self, app=None):
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('QUERY_MONITORING_ENABLED', True)
+        if not self.enabled:
+            return
+
+        app.jinja_env.template_class = TimedTemplate
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._add_timing_header)
+        app.teardown_request(self._finish_request)
+
+    def _start_request(self):
+        if not self.enabled:
+            return
+        g.profile = {
+            "start": time.perf_counter(),
+            "queries": [],
+            "render_time": 0.0,
+            "explaining": False,
+        }
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'profile' in g and not g.profile['explaining']:
+            conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'profile' in g and conn.info.get('query_start'):
+            duration = time.perf_counter() - conn.info['query_start'].pop()
+            g.profile['queries'].append({
+                "statement": statement,
+                "parameters": None if executemany else parameters,
+                "duration": duration,
+                "engine": conn.engine,
+            })
+
+    def _add_timing_header(self, response):
+        # Streamed bodies are not produced yet, so this only covers the view.
+        if 'profile' in g:
+            queries = g.profile['queries']
+            response.headers['Server-Timing'] = 'db;dur={:.1f};desc="{} queries", render;dur={:.1f}'.format(
+                sum(query['duration'] for query in queries) * 1000,
+                len(queries),
+                g.profile['render_time'] * 1000
+            )
+        return response
+
+    def _finish_request(self, error=None):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+
+        queries = profile['queries']
+        total_time = time.perf_counter() - profile['start']
+        db_time = sum(query['duration'] for query in queries)
+        summary = '{} {} [{}]: {} queries, db {:.1f}ms, render {:.1f}ms, total {:.1f}ms'.format(
+            request.method, request.path, request.endpoint, len(queries),
+            db_time * 1000, profile['render_time'] * 1000, total_time * 1000)
+
+        config = self.app.config
+        if len(queries) <= config.get('QUERY_BUDGET', 20) and \
+                total_time <= config.get('SLOW_REQUEST_THRESHOLD', 0.5):
+            self.app.logger.debug(summary)
+            return
+
+        slowest = sorted(queries, key=lambda query: query['duration'], reverse=True)
+        slowest = slowest[:config.get('SLOW_QUERY_EXPLAIN_COUNT', 3)]
+        details = [summary]
+
+        for query in slowest:
+            details.append('  {:.1f}ms: {}'.format(query['duration'] * 1000, query['statement']))
+            plan = self._explain(profile, query)
+            if plan:
+                details.extend('    ' + line for line in plan)
+
+        self.app.logger.warning('\n'.join(details))
+
+    def _explain(self, profile, query):
+        statement = query['statement']
+        if query['parameters'] is None or not statement.lstrip().upper().startswith('SELECT'):
+            return None
+
+        profile['explaining'] = True
+        try:
+            with query['engine'].connect() as connection:
+                rows = connection.exec_driver_sql('EXPLAIN ' + statement, query['parameters'])
+                return [row[0] for row in rows]
+        except Exception as error:
+            return ['EXPLAIN failed: {}'.format(error)]
+        finally:
+            profile['explaining'] = False
+
+query_monitor = QueryMonitor()
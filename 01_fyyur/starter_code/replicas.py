@@ -0,0 +1,101 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import random
+import time
+from flask import g, request, session, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+
+#----------------------------------------------------------------------------#
+# Read replica routing.
+#----------------------------------------------------------------------------#
+
+# Replica engines are Flask-SQLAlchemy binds named replica_<n>, see
+# SQLALCHEMY_BINDS in config.py.
+REPLICA_PREFIX = 'replica_'
+
+class RoutingSession(SignallingSession):
+    '''
+    Session reading from the replica chosen for the current request.
+
+    Flushes, and every request without a replica, use the primary.
+    '''
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        bind_key = g.get('replica') if has_request_context() else None
+        if bind_key is not None and not self._flushing:
+            return self.db.get_engine(self.app, bind=bind_key)
+        return super().get_bind(mapper, clause)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+class ReplicaRouter:
+    '''
+    Sends the reads of read-only views to a random read replica.
+
+    Views are marked with the read_only decorator. A user who has just
+    written goes to the primary for REPLICA_STICKINESS seconds so they
+    see their own changes whatever the replication lag.
+    '''
+
+    def __init__(self, app=None, db=None):
+        self.replicas = []
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        self.replicas = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {}
+                               if key.startswith(REPLICA_PREFIX))
+        self.stickiness = app.config.get('REPLICA_STICKINESS', 5)
+
+        event.listen(RoutingSession, 'after_flush', self._record_write)
+        event.listen(RoutingSession, 'do_orm_execute', self._record_bulk_write)
+        app.before_request(self._choose_replica)
+        app.after_request(self._stick_to_primary)
+
+    def read_only(self, view):
+        '''
+        Marks a view as safe to serve from a read replica.
+        '''
+
+        view.read_only = True
+        return view
+
+    def engines(self):
+        '''
+        Returns the replica engines by bind key.
+        '''
+
+        return {key: self.db.get_engine(self.app, bind=key) for key in self.replicas}
+
+    def _choose_replica(self):
+        if not self.replicas or session.get('primary_until', 0) > time.time():
+            return
+        view = self.app.view_functions.get(request.endpoint)
+        if getattr(view, 'read_only', False):
+            g.replica = random.choice(self.replicas)
+
+    def _record_write(self, db_session, flush_context):
+        if has_request_context():
+            g.database_written = True
+
+    def _record_bulk_write(self, orm_execute_state):
+        if has_request_context() and (orm_execute_state.is_update or orm_execute_state.is_delete):
+            g.database_written = True
+
+    def _stick_to_primary(self, response):
+        if self.replicas and g.get('database_written'):
+            session['primary_until'] = time.time() + self.stickiness
+        return response
+
+replica_router = ReplicaRouter()
@@ -0,0 +1,93 @@
+import os
+import sys
+import pytest
+
+# The app modules live in the project root, next to this folder.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The database tests run against scratch databases, which they empty:
+#
+#   TEST_DATABASE_URL          the primary, e.g. postgresql://localhost/fyyur_test
+#   TEST_DATABASE_REPLICA_URL  a second database standing in for a read
+#                              replica, for the replica routing tests
+#
+# The app reads its config when imported, so they are set up before.
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+TEST_DATABASE_REPLICA_URL = os.environ.get('TEST_DATABASE_REPLICA_URL')
+
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+    os.environ['SECRET_KEY'] = 'test'
+    os.environ['DATABASE_REPLICA_URLS'] = TEST_DATABASE_REPLICA_URL or ''
+
+EXTENSIONS = ('btree_gist', 'pg_trgm')
+
+def engines(app):
+    '''
+    Returns the engines of the primary and of the replicas.
+    '''
+
+    from models import db
+
+    return [db.get_engine(app, bind=key) for key in [None] + list(app.config['SQLALCHEMY_BINDS'])]
+
+@pytest.fixture(scope='session')
+def app():
+    '''
+    The app, with the tables created in the test databases.
+    '''
+
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+
+    from app import app
+    from models import db
+    from cache import cache
+
+    cache.enabled = False
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        for engine in engines(app):
+            with engine.begin() as connection:
+                for extension in EXTENSIONS:
+                    connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS ' + extension)
+            db.metadata.create_all(engine)
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        for engine in engines(app):
+            db.metadata.drop_all(engine)
+
+@pytest.fixture
+def database(app):
+    '''
+    Empties the test databases after the test.
+
+    Requests made with the test client push their own app context, so
+    that g does not outlive them: use app_context around direct queries.
+
+    Returns:
+        db (obj): The app's database.
+    '''
+
+    from models import db
+
+    yield db
+
+    with app.app_context():
+        db.session.remove()
+        for engine in engines(app):
+            with engine.begin() as connection:
+                connection.exec_driver_sql('TRUNCATE "show", show_archive, venue, artist RESTART IDENTITY')
+
+@pytest.fixture
+def app_context(app, database):
+    with app.app_context():
+        yield
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
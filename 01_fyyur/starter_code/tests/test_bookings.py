@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import pytest
+
+# Shows last two hours by default: the booked one ends at 22:00.
+BOOKED = datetime(2030, 6, 1, 20, 0)
+TWO_HOURS = timedelta(hours=2)
+
+@pytest.fixture
+def venue_id(app_context, database):
+    '''
+    A venue booked from 20:00 to 22:00, and another venue left free.
+    '''
+
+    from models import Venue, Artist, Show
+
+    venue, other_venue = Venue(name='The Musical Hop', state='CA', city='San Francisco'), \
+        Venue(name='Park Square Live Music & Coffee', state='CA', city='San Francisco')
+    artist = Artist(name='Guns N Petals')
+    database.session.add_all([venue, other_venue, artist])
+    database.session.flush()
+    database.session.add(Show(venue_id=venue.id, artist_id=artist.id, start_time=BOOKED))
+    database.session.commit()
+
+    return venue.id
+
+def row(venue_id, start_time, duration=TWO_HOURS):
+    return {'venue_id': venue_id, 'start_time': start_time, 'duration': duration}
+
+@pytest.mark.parametrize('start_time, conflict', [
+    (BOOKED + TWO_HOURS, False),
+    (BOOKED + TWO_HOURS - timedelta(minutes=1), True),
+    (BOOKED - TWO_HOURS, False),
+    (BOOKED - TWO_HOURS + timedelta(minutes=1), True),
+    (BOOKED, True),
+])
+def test_back_to_back_shows_do_not_conflict(venue_id, start_time, conflict):
+    from bookings import find_booking_conflict
+
+    assert (find_booking_conflict(venue_id, start_time, TWO_HOURS) is not None) is conflict
+
+def test_conflict_names_the_booked_show(venue_id):
+    from bookings import find_booking_conflict, booking_conflict_message
+
+    show = find_booking_conflict(venue_id, BOOKED + timedelta(hours=1), TWO_HOURS)
+
+    assert booking_conflict_message(show) == \
+        'The venue is already booked from 2030-06-01 20:00 to 2030-06-01 22:00 for a show of Guns N Petals (show 1).'
+
+def test_batch_conflicts_with_the_database_and_earlier_rows(venue_id):
+    from bookings import find_batch_conflicts
+
+    other_venue_id = venue_id + 1
+    errors = find_batch_conflicts([
+        (2, row(venue_id, BOOKED - TWO_HOURS)),
+        (3, row(venue_id, BOOKED + timedelta(hours=1))),
+        (4, row(venue_id, BOOKED + TWO_HOURS)),
+        (5, row(venue_id, BOOKED + TWO_HOURS + timedelta(hours=1))),
+        (6, row(venue_id, BOOKED + 2 * TWO_HOURS)),
+        (7, row(other_venue_id, BOOKED)),
+    ])
+
+    assert sorted(errors) == [3, 5]
+    assert 'Guns N Petals' in errors[3]
+    assert errors[5] == 'The venue is already booked at that time by the show of line 4.'
+
+def test_rows_clashing_with_the_database_do_not_block_later_rows(venue_id):
+    from bookings import find_batch_conflicts
+
+    errors = find_batch_conflicts([
+        (2, row(venue_id, BOOKED + timedelta(hours=1))),
+        (3, row(venue_id, BOOKED + TWO_HOURS)),
+    ])
+
+    assert sorted(errors) == [2]
@@ -0,0 +1,140 @@
+import time
+import pytest
+from flask import Flask, flash
+from cache import CacheBackend, LRUCache, ResponseCache
+
+#----------------------------------------------------------------------------#
+# Fixtures.
+#----------------------------------------------------------------------------#
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('cache.time.monotonic', clock)
+    return clock
+
+@pytest.fixture
+def cached_app():
+    '''
+    An app with one cached listing, counting how often it is rendered.
+    '''
+
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    response_cache = ResponseCache(app)
+    app.renders = 0
+
+    @app.route('/listing')
+    @response_cache.cached
+    def listing():
+        app.renders += 1
+        return 'listing {}'.format(app.renders)
+
+    @app.route('/notify')
+    def notify():
+        flash('Venue was successfully listed!')
+        return 'ok'
+
+    app.response_cache = response_cache
+    return app
+
+#----------------------------------------------------------------------------#
+# Backends.
+#----------------------------------------------------------------------------#
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+def test_lru_evicts_least_recently_used(clock):
+    backend = LRUCache(max_entries=2, ttl=60)
+    backend.set('a', 1)
+    backend.set('b', 2)
+    assert backend.get('a') == 1
+
+    backend.set('c', 3)
+
+    assert backend.get('b') is None
+    assert backend.get('a') == 1
+    assert backend.get('c') == 3
+    assert len(backend) == 2
+
+def test_lru_expires_entries_after_ttl(clock):
+    backend = LRUCache(max_entries=10, ttl=60)
+    backend.set('a', 1)
+
+    clock.now += 59
+    assert backend.get('a') == 1
+
+    clock.now += 2
+    assert backend.get('a') is None
+    assert len(backend) == 0
+
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+def test_serves_repeated_requests_from_cache(cached_app):
+    client = cached_app.test_client()
+
+    first = client.get('/listing')
+    second = client.get('/listing')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_data(as_text=True) == 'listing 1'
+    assert cached_app.renders == 1
+
+def test_invalidate_bumps_the_namespace_version(cached_app):
+    client = cached_app.test_client()
+    client.get('/listing')
+
+    cached_app.response_cache.invalidate('show_venue', venue_id=1)
+    assert client.get('/listing').headers['X-Cache'] == 'HIT'
+
+    cached_app.response_cache.invalidate('listing')
+    response = client.get('/listing')
+
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_data(as_text=True) == 'listing 2'
+    assert client.get('/listing').headers['X-Cache'] == 'HIT'
+
+def test_pending_flashes_bypass_the_cache(cached_app):
+    client = cached_app.test_client()
+    client.get('/listing')
+    client.get('/notify')
+
+    response = client.get('/listing')
+
+    assert 'X-Cache' not in response.headers
+    assert cached_app.renders == 2
+
+def test_pages_with_flashes_are_not_stored(cached_app):
+    client = cached_app.test_client()
+    client.get('/notify')
+    client.get('/listing')
+
+    # The messages were only flashed, never shown, so they are still
+    # pending: nothing may have been stored in the meantime.
+    with client.session_transaction() as session:
+        session.pop('_flashes')
+
+    assert client.get('/listing').headers['X-Cache'] == 'MISS'
+    assert cached_app.renders == 2
+
+def test_users_sticking_to_the_primary_bypass_the_cache(cached_app):
+    client = cached_app.test_client()
+    client.get('/listing')
+
+    with client.session_transaction() as session:
+        session['primary_until'] = time.time() + 5
+
+    assert 'X-Cache' not in client.get('/listing').headers
+    assert cached_app.renders == 2
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+import pytest
+
+NOW = datetime(2030, 6, 1, 12, 0)
+
+@pytest.fixture
+def booking(app_context, database):
+    '''
+    A venue and an artist, with shows yesterday, in one and in two days.
+    '''
+
+    from models import Venue, Artist, Show
+    import counters
+
+    venue = Venue(name='The Musical Hop', state='CA', city='San Francisco')
+    artist = Artist(name='Guns N Petals')
+    database.session.add_all([venue, artist])
+    database.session.flush()
+
+    for days in (-1, 2, 1):
+        show = Show(venue_id=venue.id, artist_id=artist.id, start_time=NOW + timedelta(days=days))
+        database.session.add(show)
+        counters.count_new_show(show, now=NOW)
+    database.session.commit()
+
+    return venue, artist
+
+def counters_of(record):
+    from models import db
+
+    db.session.refresh(record)
+    return record.upcoming_shows_count, record.next_show_time
+
+def test_new_upcoming_shows_are_counted(booking):
+    venue, artist = booking
+
+    assert counters_of(venue) == (2, NOW + timedelta(days=1))
+    assert counters_of(artist) == (2, NOW + timedelta(days=1))
+
+def test_rollover_moves_started_shows_out(booking):
+    import counters
+
+    venue, artist = booking
+    updated = counters.rollover_counters(now=NOW + timedelta(days=1, hours=1))
+
+    assert updated == {'venue': 1, 'artist': 1}
+    assert counters_of(venue) == (1, NOW + timedelta(days=2))
+    assert counters_of(artist) == (1, NOW + timedelta(days=2))
+
+def test_repair_fixes_drifted_counters(booking):
+    import counters
+
+    venue, artist = booking
+    artist.upcoming_shows_count = 5
+    artist.next_show_time = None
+
+    assert counters.repair_counters(now=NOW) == {'venue': 0, 'artist': 1}
+    assert counters_of(artist) == (2, NOW + timedelta(days=1))
+
+def test_deleting_a_venue_recounts_its_artists(app, booking, client):
+    from models import Artist
+
+    venue, artist = booking
+    client.delete('/venues/{}'.format(venue.id))
+
+    artist = Artist.query.get(artist.id)
+    assert counters_of(artist) == (0, None)
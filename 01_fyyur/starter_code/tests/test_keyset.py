@@ -0,0 +1,97 @@
+from urllib.parse import urlsplit
+import pytest
+
+# Venues in insertion (id) order. Several share an area, so the pages have
+# to break ties on the id.
+AREAS = [
+    ('CA', 'San Francisco'), ('NY', 'New York'), ('CA', 'Oakland'), ('CA', 'San Francisco'),
+    ('AL', 'Mobile'), ('NY', 'New York'), ('CA', 'San Francisco'),
+]
+
+PAGE_SIZE = 2
+
+@pytest.fixture
+def venue_ids(app_context, database):
+    '''
+    The venue ids, in the (state, city, id) order of the listing.
+    '''
+
+    from models import Venue
+
+    venues = [Venue(name='Venue {}'.format(number), state=state, city=city)
+              for number, (state, city) in enumerate(AREAS)]
+    database.session.add_all(venues)
+    database.session.commit()
+
+    return [venue.id for venue in sorted(venues, key=lambda venue: (venue.state, venue.city, venue.id))]
+
+def read_page(app, url):
+    '''
+    Reads a page of the venue listing.
+
+    Returns:
+        ids (list): The venue ids of the page.
+        prev_url (str), next_url (str): The neighbouring pages, or None.
+    '''
+
+    from app import keyset_paginate, venue_areas_query, VENUE_AREAS_KEY
+    from models import Venue
+
+    with app.test_request_context(url):
+        page = keyset_paginate(venue_areas_query(), Venue, VENUE_AREAS_KEY)
+
+    return [row.id for row in page["items"]], page["prev_url"], page["next_url"]
+
+def relative(url):
+    # The page urls are absolute paths with the query string.
+    parts = urlsplit(url)
+    return '{}?{}'.format(parts.path, parts.query)
+
+def test_next_pages_cover_the_listing_in_key_order(app, venue_ids):
+    pages = []
+    ids, prev_url, next_url = read_page(app, '/venues?limit={}'.format(PAGE_SIZE))
+    assert prev_url is None
+    pages.append(ids)
+
+    while next_url is not None:
+        ids, prev_url, next_url = read_page(app, relative(next_url))
+        assert prev_url is not None
+        pages.append(ids)
+
+    assert [venue_id for ids in pages for venue_id in ids] == venue_ids
+    assert [len(ids) for ids in pages] == [2, 2, 2, 1]
+
+def test_previous_pages_lead_back_to_the_first(app, venue_ids):
+    # Start from the last page, found by following the next pages.
+    url = '/venues?limit={}'.format(PAGE_SIZE)
+    forward = []
+    while url is not None:
+        ids, _, next_url = read_page(app, url)
+        forward.append(ids)
+        url = next_url and relative(next_url)
+
+    _, prev_url, _ = read_page(app, '/venues?limit={}&after={}'.format(PAGE_SIZE, forward[-2][-1]))
+    backward = []
+    while prev_url is not None:
+        ids, prev_url, next_url = read_page(app, relative(prev_url))
+        assert next_url is not None
+        backward.append(ids)
+
+    assert backward[::-1] == forward[:-1]
+
+def test_cursor_in_the_middle_of_an_area(app, venue_ids):
+    # venue_ids[2] shares its area with venue_ids[3] and venue_ids[4].
+    ids, _, _ = read_page(app, '/venues?limit=3&after={}'.format(venue_ids[2]))
+    assert ids == venue_ids[3:6]
+
+    ids, _, _ = read_page(app, '/venues?limit=3&before={}'.format(venue_ids[5]))
+    assert ids == venue_ids[2:5]
+
+@pytest.mark.parametrize('query', ['after=abc', 'before=1.5', 'limit=ten', 'from=tomorrow'])
+def test_api_rejects_bad_arguments_with_json(app, client, query):
+    path = '/api/v1/shows' if query.startswith('from') else '/api/v1/venues'
+    response = client.get('{}?{}'.format(path, query))
+
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+    assert query.split('=')[0] in response.get_json()["error"]
@@ -0,0 +1,49 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+
+@pytest.fixture
+def schedule(app, app_context, database, monkeypatch):
+    '''
+    A venue and an artist with five past shows, two of them archived, and
+    an upcoming one, listing at most two past shows.
+    '''
+
+    from models import Venue, Artist, Show, ShowArchive
+
+    monkeypatch.setitem(app.config, 'PAST_SHOWS_LIMIT', 2)
+
+    venue = Venue(name='The Musical Hop', state='CA', city='San Francisco')
+    artist = Artist(name='Guns N Petals')
+    database.session.add_all([venue, artist])
+    database.session.flush()
+
+    now = datetime.now().replace(microsecond=0)
+    for days in (-5, -4):
+        database.session.add(ShowArchive(id=days, venue_id=venue.id, artist_id=artist.id,
+                                         start_time=now + timedelta(days=days), duration=timedelta(hours=2)))
+    for days in (-3, -2, -1, 1):
+        database.session.add(Show(venue_id=venue.id, artist_id=artist.id, start_time=now + timedelta(days=days)))
+    database.session.commit()
+
+    return venue.id, artist.id
+
+def test_past_shows_count_includes_the_unlisted_ones(schedule):
+    from app import get_venue_details, get_artist_details
+
+    venue_id, artist_id = schedule
+
+    for details in (get_venue_details(venue_id), get_artist_details(artist_id)):
+        assert len(details["past_shows"]) == 2
+        assert details["past_shows_count"] == 5
+        assert details["upcoming_shows_count"] == 1
+
+def test_show_venue_page_shows_the_past_shows_count(schedule, client):
+    venue_id, artist_id = schedule
+    # The shows are only in the primary, keep off a configured replica.
+    with client.session_transaction() as session:
+        session['primary_until'] = time.time() + 60
+
+    page = client.get('/venues/{}'.format(venue_id)).get_data(as_text=True)
+
+    assert '5 Past Shows' in page
@@ -0,0 +1,97 @@
+import time
+import pytest
+from conftest import TEST_DATABASE_REPLICA_URL
+
+# The replica is a second, independent database: a venue only inserted in
+# one of them tells which one a view read.
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_REPLICA_URL, reason='TEST_DATABASE_REPLICA_URL is not set')
+
+REPLICA = 'replica_0'
+
+VENUE = {
+    'city': 'San Francisco',
+    'state': 'CA',
+    'address': '1015 Folsom Street',
+    'phone': '123-123-1234',
+    'genres': ['Jazz'],
+}
+
+VENUE_FORM = {
+    'name': 'The Musical Hop',
+    'city': 'San Francisco',
+    'state': 'CA',
+    'address': '1015 Folsom Street',
+    'phone': '123-123-1234',
+    'genres': 'Jazz',
+    'facebook_link': 'https://www.facebook.com/TheMusicalHop',
+    'image_link': 'https://example.com/hop.jpg',
+    'website_link': 'https://www.themusicalhop.com',
+    'seeking_description': '',
+}
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def insert_venue(app, bind, name):
+    '''
+    Inserts a venue straight into the primary (bind None) or the replica.
+    '''
+
+    from models import db, Venue
+
+    with app.app_context(), db.get_engine(app, bind=bind).begin() as connection:
+        return connection.execute(
+            Venue.__table__.insert().returning(Venue.__table__.c.id), dict(VENUE, name=name)).scalar()
+
+def venue_names(app, bind):
+    from models import db, Venue
+
+    with app.app_context(), db.get_engine(app, bind=bind).connect() as connection:
+        return sorted(name for name, in connection.execute(db.select(Venue.__table__.c.name)))
+
+#----------------------------------------------------------------------------#
+# Routing.
+#----------------------------------------------------------------------------#
+
+def test_get_views_read_from_the_replica(app, database, client):
+    insert_venue(app, None, 'Primary Hall')
+    insert_venue(app, REPLICA, 'Replica Hall')
+
+    page = client.get('/venues').get_data(as_text=True)
+
+    assert 'Replica Hall' in page
+    assert 'Primary Hall' not in page
+
+def test_post_and_delete_write_to_the_primary(app, database, client):
+    client.post('/venues/create', data=VENUE_FORM)
+
+    assert venue_names(app, None) == ['The Musical Hop']
+    assert venue_names(app, REPLICA) == []
+
+    # The same venue on both sides: only the primary one goes.
+    venue_id = insert_venue(app, None, 'Closing Hall')
+    insert_venue(app, REPLICA, 'Closing Hall')
+
+    client.delete('/venues/{}'.format(venue_id))
+
+    assert venue_names(app, None) == ['The Musical Hop']
+    assert venue_names(app, REPLICA) == ['Closing Hall']
+
+def test_reads_after_a_write_stick_to_the_primary(app, database, client):
+    insert_venue(app, REPLICA, 'Replica Hall')
+
+    client.post('/venues/create', data=VENUE_FORM)
+    page = client.get('/venues').get_data(as_text=True)
+
+    assert 'The Musical Hop' in page
+    assert 'Replica Hall' not in page
+
+    # Once the REPLICA_STICKINESS window is over, reads go back to the replica.
+    with client.session_transaction() as session:
+        session['primary_until'] = time.time() - 1
+
+    page = client.get('/venues').get_data(as_text=True)
+
+    assert 'Replica Hall' in page
+    assert 'The Musical Hop' not in page